@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QUrl
+from PyQt5.QtGui import QImage, QTextCursor, QTextDocument, QTextImageFormat
+from PyQt5.QtWidgets import QApplication
+
+from py_notepad.image_handler.image_serializer import collect_images
+
+
+def collect_images_per_character(document):
+    # 기존 구현: 모든 문자마다 QTextCursor를 움직이고 charFormat()을 호출한다.
+    images = {}
+    block = document.begin()
+    while block != document.end():
+        block_cursor = QTextCursor(block)
+        block_cursor.movePosition(QTextCursor.StartOfBlock)
+        while block_cursor.position() < block.position() + block.length() - 1:
+            block_cursor.movePosition(QTextCursor.NextCharacter, QTextCursor.KeepAnchor)
+            char_format = block_cursor.charFormat()
+            if char_format.isImageFormat():
+                image_name = char_format.toImageFormat().name()
+                images[image_name] = document.resource(QTextDocument.ImageResource, QUrl(image_name))
+            block_cursor.clearSelection()
+        block = block.next()
+    return images
+
+
+def build_document(text_size, image_count):
+    document = QTextDocument()
+    cursor = QTextCursor(document)
+    paragraph = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4
+    paragraphs = max(1, text_size // len(paragraph))
+    image_every = max(1, paragraphs // max(1, image_count))
+    image = QImage(64, 64, QImage.Format_RGB32)
+    image.fill(0x3366cc)
+
+    for index in range(paragraphs):
+        cursor.insertText(paragraph)
+        if index % image_every == 0:
+            image_name = f"image_{index}.png"
+            document.addResource(QTextDocument.ImageResource, QUrl(image_name), image)
+            image_format = QTextImageFormat()
+            image_format.setName(image_name)
+            cursor.insertImage(image_format)
+        cursor.insertBlock()
+    return document
+
+
+def measure(function, document, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(document)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    app = QApplication(sys.argv)
+    for text_size in (20_000, 200_000, 1_000_000):
+        document = build_document(text_size, image_count=50)
+        old_time, old_images = measure(collect_images_per_character, document)
+        new_time, new_images = measure(collect_images, document)
+        assert set(old_images) == set(new_images)
+        print(f"{text_size:>9} chars, {len(new_images):>3} images: "
+              f"per-character {old_time * 1000:8.1f} ms | fragments {new_time * 1000:7.2f} ms | "
+              f"x{old_time / new_time:.0f}")
+
+
+if __name__ == "__main__":
+    main()
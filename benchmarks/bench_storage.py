@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from py_notepad.notepad_data_manager import NotePadDataManager
+
+STORAGE_FORMATS = ("json", "tab_dir", "sqlite", "journal", "compressed", "container")
+TAB_COUNTS = (10, 100, 1000)
+
+QT_HTML_HEADER = (
+    '<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.0//EN" "http://www.w3.org/TR/REC-html40/strict.dtd">\n'
+    '<html><head><meta name="qrichtext" content="1" /><style type="text/css">\n'
+    'p, li { white-space: pre-wrap; }\n'
+    '</style></head><body style=" font-family:\'맑은 고딕\'; font-size:12pt; font-weight:400; font-style:normal;">\n'
+)
+QT_PARAGRAPH = (
+    '<p style=" margin-top:0px; margin-bottom:0px; margin-left:0px; margin-right:0px; '
+    '-qt-block-indent:0; text-indent:0px;">{text}</p>\n'
+)
+
+
+def build_notebook(tab_count, paragraphs=60):
+    tabs = []
+    for index in range(tab_count):
+        body = "".join(QT_PARAGRAPH.format(text=f"Tab {index} line {line} - measurement notes and results")
+                       for line in range(paragraphs))
+        tabs.append({"id": f"tab{index:05d}", "title": f"Tab {index}", "content": QT_HTML_HEADER + body + "</body></html>"})
+    return {"serial": "bench", "active_tab_index": 0, "tabs": tabs, "version": 1}
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def local_size(directory):
+    total = 0
+    for root, _, files in os.walk(directory):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def run(storage_format, tab_count):
+    with tempfile.TemporaryDirectory() as directory:
+        manager = NotePadDataManager("bench", local_file=os.path.join(directory, "tabs_data.json"),
+                                     storage_format=storage_format)
+        data = build_notebook(tab_count)
+        full_save, _ = timed(manager.save_to_local, data)
+
+        data["tabs"][tab_count // 2]["content"] += "<p>edited</p>"
+        data["version"] += 1
+        one_tab_save, _ = timed(manager.save_to_local, data)
+
+        load, loaded = timed(manager.load_from_local)
+        assert len(loaded["tabs"]) == tab_count
+        version, _ = timed(manager.get_local_version)
+        tab_read, content = timed(manager.read_tab, data["tabs"][tab_count // 2]["id"])
+        assert content == data["tabs"][tab_count // 2]["content"]
+        size = local_size(directory)
+        if hasattr(manager.store, "close"):
+            manager.store.close()
+    return full_save, one_tab_save, load, version, tab_read, size
+
+
+def main():
+    results = []
+    for tab_count in TAB_COUNTS:
+        for storage_format in STORAGE_FORMATS:
+            results.append((storage_format, tab_count) + run(storage_format, tab_count))
+
+    print()
+    # 압축률은 같은 탭 수의 json 크기에 대한 비율이다
+    json_sizes = {tab_count: size for storage_format, tab_count, *_, size in results if storage_format == "json"}
+    print(f"{'format':>10} {'tabs':>6} {'full save':>11} {'1-tab save':>11} {'load':>10} {'version':>10} "
+          f"{'1-tab read':>11} {'size':>12} {'ratio':>7}")
+    for storage_format, tab_count, full_save, one_tab_save, load, version, tab_read, size in results:
+        print(f"{storage_format:>10} {tab_count:>6} {full_save:>8.1f} ms {one_tab_save:>8.1f} ms "
+              f"{load:>7.1f} ms {version:>7.2f} ms {tab_read:>8.2f} ms {size / 1024:>9.0f} KB "
+              f"{json_sizes[tab_count] / size:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
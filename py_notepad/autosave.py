@@ -0,0 +1,115 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+
+
+class AutosaveScheduler(QObject):
+    # 편집이 멈추고 debounce_ms가 지나면 그동안 바뀐 탭만 저장한다. 계속 입력 중이어도
+    # 첫 변경 뒤 max_delay_ms 안에는 한 번 저장한다. 서버 업로드는 로컬 저장과 따로
+    # upload_interval_ms에 한 번 이하로 제한하고, 건너뛴 업로드는 간격이 지나면 따로 보낸다.
+    def __init__(self, save_callback, upload_callback, debounce_ms=2000, max_delay_ms=10000,
+                 upload_interval_ms=60000, parent=None):
+        super().__init__(parent)
+        self.save_callback = save_callback
+        self.upload_callback = upload_callback
+        self.debounce_ms = debounce_ms
+        self.max_delay_ms = max_delay_ms
+        self.upload_interval_ms = upload_interval_ms
+        self.dirty_tabs = set()
+        self.structure_changed = False
+        self.first_change = None
+        self.last_upload = None
+        self.upload_pending = False
+        self.enabled = True
+        # 서버 동기화 결과를 화면에 반영하는 동안에는 변경으로 치지 않는다
+        self.paused = False
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.timeout.connect(self.save_now)
+        self.upload_timer = QTimer(self)
+        self.upload_timer.setSingleShot(True)
+        self.upload_timer.timeout.connect(self.upload_now)
+
+    def configure(self, debounce_ms, upload_interval_ms):
+        self.debounce_ms = debounce_ms
+        self.max_delay_ms = max(debounce_ms * 5, self.max_delay_ms) if debounce_ms else 0
+        self.upload_interval_ms = upload_interval_ms
+        self.enabled = debounce_ms > 0
+        if not self.enabled:
+            self.save_timer.stop()
+
+    def watch(self, editor):
+        document = editor.document()
+        document.contentsChange.connect(lambda position, removed, added: self.mark_dirty(editor.tab_id))
+        document.modificationChanged.connect(lambda changed: changed and self.mark_dirty(editor.tab_id))
+
+    def mark_dirty(self, tab_id):
+        if self.paused:
+            return
+        self.dirty_tabs.add(tab_id)
+        self.schedule()
+
+    def mark_structure_changed(self):
+        # 탭 닫기, 이동, 이름 변경처럼 본문은 그대로지만 저장이 필요한 변경
+        if self.paused:
+            return
+        self.structure_changed = True
+        self.schedule()
+
+    def schedule(self):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if self.first_change is None:
+            self.first_change = now
+        waited_ms = (now - self.first_change) * 1000
+        self.save_timer.start(int(max(0, min(self.debounce_ms, self.max_delay_ms - waited_ms))))
+
+    def take_dirty(self):
+        dirty_tabs = self.dirty_tabs
+        self.dirty_tabs = set()
+        self.structure_changed = False
+        self.first_change = None
+        self.save_timer.stop()
+        return dirty_tabs
+
+    def save_now(self):
+        if not (self.dirty_tabs or self.structure_changed):
+            return
+        upload = self.upload_due()
+        dirty_tabs = self.take_dirty()
+        if not self.save_callback(dirty_tabs, upload):
+            # 저장하지 못했으면(탭을 불러오는 중 등) 조금 뒤에 다시 시도한다
+            self.dirty_tabs |= dirty_tabs
+            self.mark_structure_changed()
+            return
+        if upload:
+            self.uploaded()
+        else:
+            self.upload_pending = True
+            self.upload_timer.start(self.upload_remaining_ms())
+
+    def upload_now(self):
+        if not self.upload_pending:
+            return
+        if self.upload_due():
+            self.upload_callback()
+            self.uploaded()
+        else:
+            self.upload_timer.start(self.upload_remaining_ms())
+
+    def upload_due(self):
+        return self.upload_remaining_ms() == 0
+
+    def upload_remaining_ms(self):
+        if self.last_upload is None:
+            return 0
+        elapsed_ms = (time.monotonic() - self.last_upload) * 1000
+        return int(max(0, self.upload_interval_ms - elapsed_ms))
+
+    def uploaded(self):
+        # 수동 저장으로 업로드했을 때도 호출해서 간격을 다시 센다
+        self.last_upload = time.monotonic()
+        self.upload_pending = False
+        self.upload_timer.stop()
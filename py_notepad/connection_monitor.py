@@ -0,0 +1,86 @@
+from PyQt5.QtCore import QObject, QTimer, QUrl, pyqtSignal
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest
+
+try:
+    from py_notepad.transport import ENDPOINT_TIMEOUTS
+except ImportError:
+    from transport import ENDPOINT_TIMEOUTS
+
+
+class ConnectionMonitor(QObject):
+    # GUI 스레드를 막지 않도록 QNetworkAccessManager로 /health/를 비동기로 확인한다.
+    # 연결돼 있으면 interval_ms마다 확인하고, 끊겨 있으면 retry_ms부터 두 배씩 max_retry_ms까지
+    # 간격을 늘린다. 다시 연결되면 recovery_checks번은 retry_ms 간격으로 확인해서 상태를 빨리 반영한다.
+    checked = pyqtSignal(bool)
+
+    def __init__(self, interval_ms=10000, retry_ms=1000, max_retry_ms=60000, recovery_checks=3, parent=None):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self.retry_ms = retry_ms
+        self.max_retry_ms = max_retry_ms
+        self.recovery_checks = recovery_checks
+        self.server_url = None
+        self.connected = None
+        self.failures = 0
+        self.fast_checks = 0
+        self.reply = None
+        self.manager = QNetworkAccessManager(self)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.check_now)
+
+    def set_server_url(self, server_url, connect_timeout=1):
+        # 주소가 바뀌면 이전 주소의 결과는 버리고 바로 다시 확인한다
+        self.stop()
+        self.server_url = server_url.rstrip("/")
+        self.timeout_ms = int(max(ENDPOINT_TIMEOUTS["health"], connect_timeout) * 1000)
+        self.connected = None
+        self.failures = 0
+        self.fast_checks = 0
+        self.check_now()
+
+    def stop(self):
+        self.timer.stop()
+        if self.reply is not None:
+            reply, self.reply = self.reply, None
+            reply.finished.disconnect(self.on_finished)
+            reply.abort()
+            reply.deleteLater()
+
+    def check_now(self):
+        # 이전 확인이 아직 끝나지 않았으면 새로 보내지 않는다
+        if not self.server_url or self.reply is not None:
+            return
+        self.timer.stop()
+        request = QNetworkRequest(QUrl(f"{self.server_url}/health/"))
+        request.setTransferTimeout(self.timeout_ms)
+        self.reply = self.manager.get(request)
+        self.reply.finished.connect(self.on_finished)
+
+    def on_finished(self):
+        reply, self.reply = self.reply, None
+        status = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        reply.deleteLater()
+        # 응답 시간을 넘기면 Qt가 요청을 취소해서 status 없이 끝난다.
+        # /health/가 없는 서버라도 HTTP 응답을 돌려주면 연결된 것으로 본다.
+        connected = status is not None and status < 500
+        self.update_state(connected)
+        self.checked.emit(connected)
+
+    def update_state(self, connected):
+        if connected:
+            if self.connected is False:
+                self.fast_checks = self.recovery_checks
+            self.failures = 0
+            if self.fast_checks > 0:
+                self.fast_checks -= 1
+                delay = self.retry_ms
+            else:
+                delay = self.interval_ms
+        else:
+            self.fast_checks = 0
+            delay = min(self.retry_ms * 2 ** self.failures, self.max_retry_ms)
+            self.failures += 1
+        self.connected = connected
+        self.timer.start(delay)
@@ -1,27 +1,133 @@
 from datetime import datetime
+import mimetypes
 
 from PyQt5.QtCore import QUrl
-from PyQt5.QtGui import QTextImageFormat, QTextDocument
+from PyQt5.QtGui import QTextImageFormat, QTextDocument, QImage, QPixmap, QTextCursor, QTextFormat
 from PyQt5.QtWidgets import QTextEdit
 
+try:
+    from py_notepad.image_handler.image_serializer import add_image_source, PASSTHROUGH_MIME_TYPES
+    from py_notepad.image_handler.image_resolver import image_resolver
+    from py_notepad.image_handler.image_handler import ImageHandler
+    from py_notepad.image_handler.image_renditions import ImageRenditionCache
+    from py_notepad.image_handler.image_properties_dialog import ImagePropertiesDialog
+except ImportError:
+    from image_handler.image_serializer import add_image_source, PASSTHROUGH_MIME_TYPES
+    from image_handler.image_resolver import image_resolver
+    from image_handler.image_handler import ImageHandler
+    from image_handler.image_renditions import ImageRenditionCache
+    from image_handler.image_properties_dialog import ImagePropertiesDialog
+
+# 배율을 바꾼 이미지가 어떤 원본에서 왔는지 기억하는 포맷 속성
+ORIGINAL_IMAGE_PROPERTY = QTextFormat.UserProperty + 1
+
+original_images = ImageHandler()
+image_renditions = ImageRenditionCache(original_images)
+
+
+def new_image_name(extension=".png", suffix=""):
+    return f'image_{datetime.now().strftime("%Y%m%d%H%M%S%f")}{suffix}{extension}'
+
 
 class CustomTextEdit(QTextEdit):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setAcceptDrops(True)
 
+    def loadResource(self, resource_type, url):
+        if resource_type == QTextDocument.ImageResource and image_resolver.can_resolve(url):
+            return image_resolver.resolve(url)
+        return super().loadResource(resource_type, url)
+
     def insertFromMimeData(self, source):
         if source.hasImage():
-            image = source.imageData()
-            self.insert_image(image)
+            data, mime_type = self.get_encoded_image_data(source)
+            image = QImage.fromData(data) if data else source.imageData()
+            if data and image.isNull():
+                data, mime_type = None, None
+                image = source.imageData()
+            self.insert_image(image, data, mime_type)
         else:
             super().insertFromMimeData(source)
 
-    def insert_image(self, image):
+    def get_encoded_image_data(self, source):
+        # 원본 바이트를 그대로 저장할 수 있도록 인코딩된 형식을 먼저 찾는다
+        for mime_type in PASSTHROUGH_MIME_TYPES:
+            if source.hasFormat(mime_type):
+                return bytes(source.data(mime_type)), mime_type
+        for url in source.urls():
+            if url.isLocalFile():
+                mime_type, _ = mimetypes.guess_type(url.toLocalFile())
+                if mime_type in PASSTHROUGH_MIME_TYPES:
+                    with open(url.toLocalFile(), "rb") as file:
+                        return file.read(), mime_type
+        return None, None
+
+    def insert_image(self, image, data=None, mime_type=None):
         cursor = self.textCursor()
         document = self.document()
         image_format = QTextImageFormat()
-        image_name = f'image_{datetime.now().strftime("%Y%m%d%H%M%S%f")}.png'
+        extension = (mimetypes.guess_extension(mime_type) if mime_type else None) or ".png"
+        image_name = new_image_name(extension)
         document.addResource(QTextDocument.ImageResource, QUrl(image_name), image)
+        if data:
+            add_image_source(document, image_name, data, mime_type)
+        original_images.add_image(image_name, image)
         image_format.setName(image_name)
+        image_format.setProperty(ORIGINAL_IMAGE_PROPERTY, image_name)
         cursor.insertImage(image_format)
+
+    def contextMenuEvent(self, event):
+        menu = self.createStandardContextMenu()
+        self.add_image_actions(menu, event.pos())
+        menu.exec_(event.globalPos())
+
+    def add_image_actions(self, menu, position):
+        cursor, image_format = self.image_at(position)
+        if image_format is not None:
+            properties_action = menu.addAction("Image Properties...")
+            properties_action.triggered.connect(lambda: self.edit_image_properties(cursor, image_format))
+
+    def image_at(self, position):
+        cursor = self.cursorForPosition(position)
+        # 커서 바로 앞 글자, 그 다음 글자 순으로 이미지인지 확인한다
+        for move_right in (False, True):
+            image_cursor = QTextCursor(cursor)
+            if move_right and not image_cursor.movePosition(QTextCursor.Right):
+                continue
+            char_format = image_cursor.charFormat()
+            if char_format.isImageFormat():
+                image_cursor.movePosition(QTextCursor.Left, QTextCursor.KeepAnchor)
+                return image_cursor, char_format.toImageFormat()
+        return None, None
+
+    def edit_image_properties(self, cursor, image_format):
+        image_id = image_format.property(ORIGINAL_IMAGE_PROPERTY) or image_format.name()
+        if original_images.get_image(image_id) is None:
+            image = self.document().resource(QTextDocument.ImageResource, QUrl(image_format.name()))
+            if isinstance(image, QPixmap):
+                image = image.toImage()
+            if image is None:
+                return
+            original_images.add_image(image_id, image)
+
+        image_renditions.prepare(image_id)
+        dialog = ImagePropertiesDialog(self)
+        dialog.title_input.setText(image_format.toolTip())
+        if not dialog.exec_():
+            return
+
+        scale, title = dialog.get_properties()
+        rendition = image_renditions.get_rendition(image_id, scale)
+        if rendition is None:
+            return
+        image_name = image_id if scale == 1.0 else new_image_name(suffix=f"_{round(scale * 100)}")
+        self.document().addResource(QTextDocument.ImageResource, QUrl(image_name), rendition)
+
+        new_format = QTextImageFormat(image_format)
+        new_format.setName(image_name)
+        new_format.setProperty(ORIGINAL_IMAGE_PROPERTY, image_id)
+        new_format.clearProperty(QTextFormat.ImageWidth)
+        new_format.clearProperty(QTextFormat.ImageHeight)
+        new_format.setToolTip(title)
+        cursor.setCharFormat(new_format)
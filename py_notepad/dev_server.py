@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+try:
+    from py_notepad.storage.tab_directory_store import new_tab_id, content_hash
+except ImportError:
+    from storage.tab_directory_store import new_tab_id, content_hash
+
+
+class NotebookRepository:
+    # 노트 서버를 대신하는 오프라인 테스트용 저장소. serial별로 노트 버전과 탭마다의 해시, 버전을 보관한다.
+    def __init__(self, data_file=None):
+        self.data_file = data_file
+        self.lock = threading.Lock()
+        self.notebooks = {}
+        if data_file and os.path.exists(data_file):
+            with open(data_file, "r", encoding='utf-8') as file:
+                self.notebooks = json.load(file)
+
+    def serials(self):
+        with self.lock:
+            return list(self.notebooks)
+
+    def load(self, serial):
+        with self.lock:
+            notebook = self.notebooks.get(serial)
+            if notebook is None:
+                return None
+            return {
+                "serial": serial,
+                "version": notebook["version"],
+                "active_tab_index": notebook["active_tab_index"],
+                "tabs": [{"id": tab["id"], "title": tab["title"], "content": tab["content"]}
+                         for tab in notebook["tabs"]],
+            }
+
+    def save(self, data):
+        # 기존 전체 저장. 바뀐 탭만 탭 버전을 올려서 delta 동기화와 함께 쓸 수 있게 한다.
+        with self.lock:
+            serial = data.get("serial", "")
+            notebook = self._notebook(serial)
+            stored = {tab["id"]: tab for tab in notebook["tabs"]}
+            tabs = []
+            for tab in data.get("tabs", []):
+                tab_id = tab.get("id") or new_tab_id()
+                tabs.append(self._updated_tab(stored.get(tab_id), tab_id, tab.get("title", "New Tab"),
+                                              tab.get("content", "")))
+            notebook["tabs"] = tabs
+            notebook["active_tab_index"] = data.get("active_tab_index", 0)
+            notebook["version"] = max(notebook["version"] + 1, data.get("version", 0))
+            self._persist()
+            return notebook["version"]
+
+    def version(self, serial):
+        with self.lock:
+            notebook = self.notebooks.get(serial)
+            return None if notebook is None else notebook["version"]
+
+    def manifest(self, serial):
+        with self.lock:
+            notebook = self.notebooks.get(serial)
+            if notebook is None:
+                return None
+            return {
+                "serial": serial,
+                "version": notebook["version"],
+                "active_tab_index": notebook["active_tab_index"],
+                "tabs": [{"id": tab["id"], "title": tab["title"], "hash": tab["hash"], "version": tab["version"]}
+                         for tab in notebook["tabs"]],
+            }
+
+    def fetch(self, serial, tab_ids):
+        with self.lock:
+            notebook = self.notebooks.get(serial) or {"tabs": []}
+            wanted = set(tab_ids)
+            return [dict(tab) for tab in notebook["tabs"] if tab["id"] in wanted]
+
+    def apply_changes(self, changes):
+        # 탭마다 클라이언트가 알고 있던 버전(base_version)이 서버 버전과 다르면 그 탭은 충돌로 돌려준다
+        with self.lock:
+            serial = changes.get("serial", "")
+            notebook = self._notebook(serial)
+            stored = {tab["id"]: tab for tab in notebook["tabs"]}
+            conflicts = []
+            for tab in changes.get("changed", []):
+                current = stored.get(tab["id"])
+                if current is not None and current["version"] != tab.get("base_version"):
+                    conflicts.append(tab["id"])
+                    continue
+                stored[tab["id"]] = self._updated_tab(current, tab["id"], tab.get("title", "New Tab"),
+                                                      tab.get("content", ""))
+            for tab_id, base_version in changes.get("deleted", {}).items():
+                current = stored.get(tab_id)
+                if current is not None and current["version"] != base_version:
+                    conflicts.append(tab_id)
+                    continue
+                stored.pop(tab_id, None)
+            for tab_id, title in changes.get("titles", {}).items():
+                if tab_id in stored:
+                    stored[tab_id]["title"] = title
+
+            # 클라이언트가 보낸 순서를 따르고, 클라이언트가 모르는 탭은 뒤에 둔다
+            order = [tab_id for tab_id in changes.get("order", []) if tab_id in stored]
+            ordered = set(order)
+            order += [tab["id"] for tab in notebook["tabs"] if tab["id"] in stored and tab["id"] not in ordered]
+            ordered.update(order)
+            order += [tab_id for tab_id in stored if tab_id not in ordered]
+            notebook["tabs"] = [stored[tab_id] for tab_id in order]
+            notebook["active_tab_index"] = changes.get("active_tab_index", notebook["active_tab_index"])
+            notebook["version"] += 1
+            self._persist()
+            return {
+                "version": notebook["version"],
+                "tabs": {tab["id"]: {"hash": tab["hash"], "version": tab["version"]} for tab in notebook["tabs"]},
+                "conflicts": conflicts,
+            }
+
+    def _notebook(self, serial):
+        if serial not in self.notebooks:
+            self.notebooks[serial] = {"version": 0, "active_tab_index": 0, "tabs": []}
+        return self.notebooks[serial]
+
+    def _updated_tab(self, current, tab_id, title, content):
+        tab_hash = content_hash(content)
+        if current is not None and current["hash"] == tab_hash:
+            return dict(current, title=title)
+        version = current["version"] + 1 if current is not None else 1
+        return {"id": tab_id, "title": title, "content": content, "hash": tab_hash, "version": version}
+
+    def _persist(self):
+        if not self.data_file:
+            return
+        temp_path = self.data_file + ".tmp"
+        with open(temp_path, "w", encoding='utf-8') as file:
+            json.dump(self.notebooks, file, ensure_ascii=False)
+        os.replace(temp_path, self.data_file)
+
+
+class NotepadRequestHandler(BaseHTTPRequestHandler):
+    repository = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/health/":
+            self.send_json({"status": "ok"})
+        elif path == "/list_serials/":
+            self.send_json({"serials": self.repository.serials()})
+        elif path.startswith("/load_tabs/"):
+            serial = self.path_serial(path, "/load_tabs/")
+            version = self.repository.version(serial)
+            if version is not None and self.etag_matches(f'"{version}"'):
+                self.send_not_modified(f'"{version}"')
+                return
+            data = self.repository.load(serial)
+            if data is None:
+                self.send_json({"detail": "Not found"}, 404)
+            else:
+                self.send_json({"tabs_data": data}, headers={"ETag": f'"{data["version"]}"'})
+        elif path.startswith("/tabs_manifest/"):
+            manifest = self.repository.manifest(self.path_serial(path, "/tabs_manifest/"))
+            if manifest is None:
+                self.send_json({"detail": "Not found"}, 404)
+            else:
+                self.send_json(manifest)
+        else:
+            self.send_json({"detail": "Not found"}, 404)
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        body = self.read_json()
+        if body is None:
+            self.send_json({"detail": "Invalid JSON"}, 400)
+        elif path == "/save_tabs/":
+            self.send_json({"version": self.repository.save(body)})
+        elif path == "/fetch_tabs/":
+            self.send_json({"tabs": self.repository.fetch(body.get("serial", ""), body.get("ids", []))})
+        elif path == "/save_tab_changes/":
+            self.send_json(self.repository.apply_changes(body))
+        else:
+            self.send_json({"detail": "Not found"}, 404)
+
+    def path_serial(self, path, prefix):
+        # 클라이언트는 serial을 두 번 quote해서 보낸다
+        return unquote(unquote(path[len(prefix):]))
+
+    def etag_matches(self, etag):
+        # If-None-Match에는 여러 값이나 약한 비교용 W/ 접두어가 올 수 있다
+        values = [value.strip() for value in self.headers.get("If-None-Match", "").split(",")]
+        return "*" in values or any((value[2:] if value.startswith("W/") else value) == etag
+                                     for value in values)
+
+    def send_not_modified(self, etag):
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return None
+
+    def send_json(self, value, status=200, headers=None):
+        body = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        for name, header_value in (headers or {}).items():
+            self.send_header(name, header_value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def create_server(host="127.0.0.1", port=9338, data_file=None):
+    handler = type("Handler", (NotepadRequestHandler,), {"repository": NotebookRepository(data_file)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the notepad server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9338)
+    parser.add_argument("--data-file", default=None, help="JSON file to keep notebooks between runs")
+    args = parser.parse_args()
+    server = create_server(args.host, args.port, args.data_file)
+    print(f"Serving notepad API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
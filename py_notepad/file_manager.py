@@ -1,8 +1,9 @@
-from PyQt5.QtCore import QUrl, QBuffer
 from PyQt5.QtWidgets import QFileDialog, QTextEdit
-from PyQt5.QtGui import QTextDocument, QTextCursor, QTextImageFormat
-import base64
-import re
+
+try:
+    from py_notepad.image_handler.image_serializer import convert_images_to_base64, convert_editors_to_html
+except ImportError:
+    from image_handler.image_serializer import convert_images_to_base64, convert_editors_to_html
 
 class FileManager:
     def __init__(self, parent):
@@ -19,13 +20,18 @@ class FileManager:
 
     def save_tabs(self):
         print("Saving tabs...")
-        tabs_data = []
+        editors = []
+        titles = []
         for index in range(self.parent.tabs.count()):
             editor = self.parent.tabs.widget(index)
             if isinstance(editor, QTextEdit):
-                html_content = self.convert_images_to_base64(editor)
-                title = self.parent.tabs.tabText(index)
-                tabs_data.append({"title": title, "content": html_content})
+                editors.append(editor)
+                titles.append(self.parent.tabs.tabText(index))
+
+        # 모든 탭의 이미지를 한 번에 병렬로 인코딩
+        html_contents = convert_editors_to_html(editors)
+        tabs_data = [{"id": getattr(editor, "tab_id", None), "title": title, "content": html_content}
+                     for editor, title, html_content in zip(editors, titles, html_contents)]
 
         # Save the active tab index
         active_tab_index = self.parent.tabs.currentIndex()
@@ -41,39 +47,4 @@ class FileManager:
         self.parent.data_manager.save_to_server(data_to_save)
 
     def convert_images_to_base64(self, editor):
-        doc = editor.document()
-        html = editor.toHtml()
-        image_format = QTextImageFormat()
-        cursor = QTextCursor(doc)
-
-        block = doc.begin()
-        while block != doc.end():
-            block_cursor = QTextCursor(block)
-            block_cursor.movePosition(QTextCursor.StartOfBlock)
-
-            while block_cursor.position() < block.position() + block.length() - 1:
-                block_cursor.movePosition(QTextCursor.NextCharacter, QTextCursor.KeepAnchor)
-                char_format = block_cursor.charFormat()
-
-                if char_format.isImageFormat():
-                    image_format = char_format.toImageFormat()
-                    image_name = image_format.name()
-                    image_url = QUrl(image_name)
-                    image = doc.resource(QTextDocument.ImageResource, image_url)
-
-                    if image is not None:
-                        buffer = QBuffer()
-                        buffer.open(QBuffer.ReadWrite)
-                        image.save(buffer, "PNG")
-                        base64_data = base64.b64encode(buffer.data()).decode()
-                        new_image_tag = f'<img src="data:image/png;base64,{base64_data}"/>'
-
-                        # Use regex to replace the old image tag with the new one
-                        pattern = re.escape(f'<img src="{image_name}"')
-                        html = re.sub(pattern + r'([^>]*>)', new_image_tag, html)
-
-                block_cursor.clearSelection()
-
-            block = block.next()
-
-        return html
+        return convert_images_to_base64(editor)
@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+
+
+class ImageEncodeCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 저장은 백그라운드 스레드에서도 실행되므로 lock으로 보호한다
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data_uri = self._entries.get(key)
+            if data_uri is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data_uri
+
+    def put(self, key, data_uri):
+        size = len(data_uri)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= len(self._entries.pop(key))
+            self._entries[key] = data_uri
+            self._current_bytes += size
+            while self._current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self._current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate(),
+        }
@@ -1,17 +1,118 @@
+import os
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+
+from PyQt5.QtGui import QImage
+
+
 class ImageHandler:
-    def __init__(self):
-        self._original_images = {}
+    def __init__(self, max_bytes=256 * 1024 * 1024, spill_dir=None):
+        # 원본 이미지를 메모리 한도 안에서 LRU로 보관하고, 밀려난 이미지는 임시 파일로 내보냈다가
+        # 다시 필요할 때 읽어 온다.
+        self.max_bytes = max_bytes
+        self._original_images = OrderedDict()
+        self._resident_bytes = 0
+        self._spilled = {}
+        self._spill_dir = spill_dir
+        self._spill_dir_cleanup = None
+        self._spill_counter = 0
+        self.evictions = 0
+        self.spill_reads = 0
+        self.spill_writes = 0
 
     def add_image(self, image_id, image):
-        self._original_images[image_id] = image
+        self._discard(image_id)
+        self._store(image_id, image)
 
     def get_image(self, image_id):
-        return self._original_images.get(image_id)
+        image = self._original_images.get(image_id)
+        if image is not None:
+            self._original_images.move_to_end(image_id)
+            return image
+        if image_id in self._spilled:
+            image = self._read_spilled(image_id)
+            self._store(image_id, image)
+            return image
+        return None
 
     def update_image(self, image_id, updated_image):
-        if image_id in self._original_images:
-            self._original_images[image_id] = updated_image
+        if image_id in self._original_images or image_id in self._spilled:
+            self._discard(image_id)
+            self._store(image_id, updated_image)
             return updated_image
         else:
             print(f"Image with ID: {image_id} not found in original images.")
-            return None
\ No newline at end of file
+            return None
+
+    def remove_image(self, image_id):
+        self._discard(image_id)
+
+    def stats(self):
+        return {
+            "resident_images": len(self._original_images),
+            "resident_bytes": self._resident_bytes,
+            "max_bytes": self.max_bytes,
+            "spilled_images": len(self._spilled),
+            "evictions": self.evictions,
+            "spill_reads": self.spill_reads,
+            "spill_writes": self.spill_writes,
+        }
+
+    def close(self):
+        self._original_images.clear()
+        self._spilled.clear()
+        self._resident_bytes = 0
+        if self._spill_dir_cleanup is not None:
+            self._spill_dir_cleanup()
+            self._spill_dir_cleanup = None
+            self._spill_dir = None
+
+    def _store(self, image_id, image):
+        self._original_images[image_id] = image
+        self._resident_bytes += image.sizeInBytes()
+        # 방금 넣은 이미지는 한도를 넘더라도 메모리에 남긴다
+        while self._resident_bytes > self.max_bytes and len(self._original_images) > 1:
+            evicted_id, evicted_image = self._original_images.popitem(last=False)
+            self._resident_bytes -= evicted_image.sizeInBytes()
+            self._spill(evicted_id, evicted_image)
+            self.evictions += 1
+
+    def _discard(self, image_id):
+        image = self._original_images.pop(image_id, None)
+        if image is not None:
+            self._resident_bytes -= image.sizeInBytes()
+        spilled = self._spilled.pop(image_id, None)
+        if spilled is not None and os.path.exists(spilled[0]):
+            os.remove(spilled[0])
+
+    def _spill(self, image_id, image):
+        if image_id in self._spilled:
+            # 내용이 바뀌지 않았다면 이미 내보낸 파일을 그대로 쓴다
+            return
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="py_notepad_images_")
+            # 직접 만든 디렉터리만 지운다. close()를 부르지 않고 끝나도 프로그램 종료 시 지워진다.
+            self._spill_dir_cleanup = weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+        self._spill_counter += 1
+        path = os.path.join(self._spill_dir, f"{self._spill_counter}.raw")
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        with open(path, "wb") as file:
+            file.write(bytes(bits))
+        # Indexed8 같은 팔레트 형식은 픽셀 값이 색상표의 번호이므로 색상표도 함께 보관한다
+        self._spilled[image_id] = (path, image.width(), image.height(), image.bytesPerLine(), image.format(),
+                                   image.colorTable())
+        self.spill_writes += 1
+
+    def _read_spilled(self, image_id):
+        path, width, height, bytes_per_line, image_format, color_table = self._spilled[image_id]
+        with open(path, "rb") as file:
+            data = file.read()
+        self.spill_reads += 1
+        # QImage는 버퍼를 복사하지 않으므로 copy()로 자체 메모리를 갖게 한다
+        image = QImage(data, width, height, bytes_per_line, image_format).copy()
+        if color_table:
+            image.setColorTable(color_table)
+        return image
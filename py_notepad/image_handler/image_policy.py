@@ -0,0 +1,62 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QImageWriter, QPainter
+
+IMAGE_FORMATS = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+LOSSY_MIME_TYPES = ("image/jpeg", "image/webp", "image/gif")
+
+
+class ImageStoragePolicy:
+    def __init__(self, image_format="PNG", quality=-1, max_dimension=0):
+        image_format = (image_format or "PNG").upper()
+        if image_format not in IMAGE_FORMATS:
+            print(f"Unknown image format: {image_format}, falling back to PNG.")
+            image_format = "PNG"
+        if image_format.lower().encode() not in [bytes(f) for f in QImageWriter.supportedImageFormats()]:
+            print(f"Image format {image_format} is not supported by this Qt build, falling back to PNG.")
+            image_format = "PNG"
+        self.image_format = image_format
+        self.quality = int(quality) if quality is not None else -1
+        self.max_dimension = int(max_dimension or 0)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            image_format=settings.get("image_format", "PNG"),
+            quality=settings.get("image_quality", -1),
+            max_dimension=settings.get("image_max_dimension", 0),
+        )
+
+    @property
+    def mime_type(self):
+        return IMAGE_FORMATS[self.image_format]
+
+    def key(self):
+        return self.image_format, self.quality, self.max_dimension
+
+    def needs_downscale(self, image):
+        if not self.max_dimension:
+            return False
+        return max(image.width(), image.height()) > self.max_dimension
+
+    def can_pass_through(self, mime_type, image):
+        # 이미 손실 압축된 원본이나 정책과 같은 형식의 원본은 다시 인코딩해도 얻을 것이 없다
+        if image is not None and self.needs_downscale(image):
+            return False
+        return mime_type == self.mime_type or mime_type in LOSSY_MIME_TYPES
+
+    def prepare(self, image):
+        if self.needs_downscale(image):
+            image = image.scaled(self.max_dimension, self.max_dimension, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        if self.image_format == "JPEG" and image.hasAlphaChannel():
+            # JPEG에는 알파 채널이 없으므로 흰 배경 위에 합성한다
+            background = QImage(image.size(), QImage.Format_RGB32)
+            background.fill(Qt.white)
+            painter = QPainter(background)
+            painter.drawImage(0, 0, image)
+            painter.end()
+            image = background
+        return image
@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import Qt
+
+RENDITION_SCALES = (0.5, 0.75, 1.25, 1.5, 2.0)
+
+
+class ImageRenditionCache:
+    def __init__(self, image_handler, scales=RENDITION_SCALES, max_bytes=128 * 1024 * 1024):
+        # 원본은 ImageHandler에 그대로 두고, 배율별로 미리 줄이거나 늘린 이미지를 보관한다.
+        # 항상 원본에서 만들기 때문에 배율을 여러 번 바꿔도 화질이 떨어지지 않는다.
+        self.image_handler = image_handler
+        self.scales = scales
+        self.max_bytes = max_bytes
+        self._renditions = OrderedDict()
+        self._current_bytes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.hits = 0
+        self.misses = 0
+
+    def prepare(self, image_id):
+        # 배율 선택 창이 떠 있는 동안 백그라운드 스레드에서 모든 배율을 만들어 둔다
+        original = self.image_handler.get_image(image_id)
+        if original is None:
+            return
+        for scale in self.scales:
+            key = (image_id, original.cacheKey(), scale)
+            with self._lock:
+                if key in self._renditions or key in self._pending:
+                    continue
+                self._pending[key] = self._executor.submit(self._render, key, original, scale)
+
+    def get_rendition(self, image_id, scale):
+        original = self.image_handler.get_image(image_id)
+        if original is None:
+            return None
+        if scale == 1.0:
+            return original
+
+        key = (image_id, original.cacheKey(), scale)
+        with self._lock:
+            rendition = self._renditions.get(key)
+            if rendition is not None:
+                self._renditions.move_to_end(key)
+                self.hits += 1
+                return rendition
+            future = self._pending.get(key)
+        self.misses += 1
+        if future is not None:
+            return future.result()
+        return self._render(key, original, scale)
+
+    def invalidate(self, image_id):
+        with self._lock:
+            for key in [key for key in self._renditions if key[0] == image_id]:
+                self._current_bytes -= self._renditions.pop(key).sizeInBytes()
+
+    def _render(self, key, original, scale):
+        width = max(1, round(original.width() * scale))
+        height = max(1, round(original.height() * scale))
+        rendition = original.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        with self._lock:
+            self._pending.pop(key, None)
+            if key not in self._renditions:
+                self._renditions[key] = rendition
+                self._current_bytes += rendition.sizeInBytes()
+            while self._current_bytes > self.max_bytes and len(self._renditions) > 1:
+                _, evicted = self._renditions.popitem(last=False)
+                self._current_bytes -= evicted.sizeInBytes()
+        return rendition
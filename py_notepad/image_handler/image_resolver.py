@@ -0,0 +1,53 @@
+from collections import OrderedDict
+
+from PyQt5.QtGui import QImage
+
+BLOB_SCHEME = "blob"
+
+
+class ImageResolver:
+    def __init__(self, blob_store=None, max_bytes=128 * 1024 * 1024):
+        self.blob_store = blob_store
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._current_bytes = 0
+        self.loads = 0
+        self.hits = 0
+
+    def can_resolve(self, url):
+        return url.scheme() == BLOB_SCHEME and self.blob_store is not None
+
+    def resolve(self, url):
+        # 레이아웃이 처음 이미지를 필요로 할 때만 blob 파일을 읽어 디코딩한다.
+        # 같은 이미지를 쓰는 다른 탭을 위해 디코딩 결과는 크기 제한이 있는 LRU에 보관한다.
+        blob_name = url.path()
+        image = self._images.get(blob_name)
+        if image is not None:
+            self._images.move_to_end(blob_name)
+            self.hits += 1
+            return image
+
+        blob = self.blob_store.get(blob_name)
+        if blob is None:
+            print(f"Missing image blob: {blob_name}")
+            return None
+        image = QImage.fromData(blob[0])
+        if image.isNull():
+            return None
+        self.loads += 1
+
+        size = image.sizeInBytes()
+        if size <= self.max_bytes:
+            self._images[blob_name] = image
+            self._current_bytes += size
+            while self._current_bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._current_bytes -= evicted.sizeInBytes()
+        return image
+
+    def clear(self):
+        self._images.clear()
+        self._current_bytes = 0
+
+
+image_resolver = ImageResolver()
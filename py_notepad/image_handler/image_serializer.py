@@ -0,0 +1,222 @@
+import base64
+import mimetypes
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QUrl, QBuffer
+from PyQt5.QtGui import QTextDocument, QPixmap
+
+try:
+    from py_notepad.image_handler.image_cache import ImageEncodeCache
+    from py_notepad.image_handler.image_policy import ImageStoragePolicy
+except ImportError:
+    from image_handler.image_cache import ImageEncodeCache
+    from image_handler.image_policy import ImageStoragePolicy
+
+IMG_TAG_PATTERN = re.compile(r'<img src="([^"]*)"[^>]*>')
+
+# 저장할 때마다 모든 이미지를 다시 PNG로 인코딩하지 않도록 QImage.cacheKey() 기준으로 결과를 기억한다.
+# cacheKey는 이미지가 수정되면 바뀌므로 오래된 결과가 재사용되지 않는다.
+encode_cache = ImageEncodeCache()
+
+# 저장 형식, 품질, 최대 크기 정책. settings.json 값으로 set_storage_policy()를 호출해 바꾼다.
+storage_policy = ImageStoragePolicy()
+
+# 붙여넣은 이미지의 원본 바이트와 MIME 타입을 별도의 사용자 리소스로 문서에 함께 보관한다.
+# QTextDocument 리소스는 URL로만 구분되므로 이미지 이름 앞에 접두어를 붙인다.
+SOURCE_RESOURCE_PREFIX = "source:"
+PASSTHROUGH_MIME_TYPES = ("image/jpeg", "image/webp", "image/gif", "image/png")
+
+
+def set_storage_policy(policy):
+    global storage_policy
+    storage_policy = policy
+
+
+def add_image_source(document, image_name, data, mime_type):
+    url = QUrl(SOURCE_RESOURCE_PREFIX + image_name)
+    document.addResource(QTextDocument.UserResource, url, (bytes(data), mime_type))
+
+
+def get_image_source(document, image_name):
+    url = QUrl(SOURCE_RESOURCE_PREFIX + image_name)
+    source = document.resource(QTextDocument.UserResource, url)
+    if not isinstance(source, tuple):
+        return None
+    return source
+
+
+def collect_image_names(document):
+    # 문자 단위가 아니라 fragment 단위로 순회한다. 같은 포맷의 연속된 문자는
+    # 하나의 fragment로 묶이므로 비용은 fragment 개수에 비례한다.
+    names = {}
+    block = document.begin()
+    while block.isValid():
+        iterator = block.begin()
+        while not iterator.atEnd():
+            fragment = iterator.fragment()
+            if fragment.isValid():
+                char_format = fragment.charFormat()
+                if char_format.isImageFormat():
+                    names[char_format.toImageFormat().name()] = None
+            iterator += 1
+        block = block.next()
+    return list(names)
+
+
+def collect_images(document):
+    return {name: get_image(document, name) for name in collect_image_names(document)}
+
+
+def get_image(document, image_name):
+    return document.resource(QTextDocument.ImageResource, QUrl(image_name))
+
+
+def stored_mime_type(image_name):
+    # data URI나 blob 참조처럼 이미 인코딩된 형태로 저장된 이미지의 MIME 타입
+    if image_name.startswith("data:"):
+        return image_name[len("data:"):].split(";", 1)[0]
+    if image_name.startswith("blob:"):
+        return mimetypes.guess_type(image_name[len("blob:"):])[0]
+    return None
+
+
+def rewrite_image_sources(html, replacements):
+    # 이미지 이름 -> data URI 매핑을 모아서 HTML을 한 번만 훑으며 새 문자열을 만든다.
+    if not replacements:
+        return html
+
+    def replace(match):
+        data_uri = replacements.get(match.group(1))
+        if data_uri is None:
+            return match.group(0)
+        return f'<img src="{data_uri}"/>'
+
+    return IMG_TAG_PATTERN.sub(replace, html)
+
+
+def encode_image(image):
+    return encode_images({"image": image})["image"]
+
+
+def encode_images(images, max_workers=None):
+    # 캐시 조회와 QPixmap -> QImage 변환은 호출한 스레드에서 하고, 실제 인코딩만 스레드 풀에서
+    # 병렬로 수행한다. QImage.save는 GIL을 놓는다. QPixmap이 들어오면 GUI 스레드에서 불러야 한다.
+    policy = storage_policy
+    data_uris = {}
+    pending = {}
+    for name, image in images.items():
+        cache_key = (image.cacheKey(), policy.key())
+        data_uri = encode_cache.get(cache_key)
+        if data_uri is not None:
+            data_uris[name] = data_uri
+            continue
+        if cache_key not in pending:
+            if isinstance(image, QPixmap):
+                image = image.toImage()
+            pending[cache_key] = (image, [])
+        pending[cache_key][1].append(name)
+
+    if len(pending) == 1:
+        results = {cache_key: _encode_with_policy(image, policy) for cache_key, (image, _) in pending.items()}
+    elif pending:
+        workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {cache_key: executor.submit(_encode_with_policy, image, policy)
+                       for cache_key, (image, _) in pending.items()}
+            results = {cache_key: future.result() for cache_key, future in futures.items()}
+    else:
+        results = {}
+
+    for cache_key, data_uri in results.items():
+        encode_cache.put(cache_key, data_uri)
+        for name in pending[cache_key][1]:
+            data_uris[name] = data_uri
+    return data_uris
+
+
+def encode_source(data, mime_type):
+    base64_data = base64.b64encode(data).decode()
+    return f"data:{mime_type};base64,{base64_data}"
+
+
+def _encode_with_policy(image, policy):
+    image = policy.prepare(image)
+    buffer = QBuffer()
+    buffer.open(QBuffer.ReadWrite)
+    image.save(buffer, policy.image_format, policy.quality)
+    base64_data = base64.b64encode(buffer.data()).decode()
+    return f"data:{policy.mime_type};base64,{base64_data}"
+
+
+def snapshot_editors(editors):
+    # GUI 스레드에서 해야 하는 부분만 한다: HTML 문자열과 인코딩할 이미지를 QImage로 모아 둔다.
+    # 결과는 render_snapshots()로 다른 스레드에서 HTML로 만들 수 있다.
+    snapshots = []
+    for editor in editors:
+        doc = editor.document()
+        html = editor.toHtml()
+        images = {}
+        passthrough = {}
+        blob_images = {}
+        for image_name in collect_image_names(doc):
+            # 크기 제한이 없으면 이미지를 디코딩할 필요 없이 통과 여부를 정할 수 있다
+            image = get_image(doc, image_name) if storage_policy.max_dimension else None
+            mime_type = stored_mime_type(image_name)
+            if mime_type is not None:
+                # 이미 인코딩된 data URI나 blob 참조는 정책상 필요할 때만 다시 인코딩한다
+                if storage_policy.can_pass_through(mime_type, image):
+                    if image_name.startswith("blob:"):
+                        # 이미지를 지웠다가 되돌리면 그 사이의 저장이 blob을 지웠을 수 있다.
+                        # 문서에 남아 있는 이미지를 함께 넘겨서 blob이 없으면 다시 저장하게 한다.
+                        image = image if image is not None else get_image(doc, image_name)
+                        if image is not None:
+                            blob_images[image_name] = image.toImage() if isinstance(image, QPixmap) else image
+                    continue
+            else:
+                source = get_image_source(doc, image_name)
+                if source is not None and storage_policy.can_pass_through(source[1], image):
+                    passthrough[image_name] = encode_source(*source)
+                    continue
+            if image is None:
+                image = get_image(doc, image_name)
+            if image is not None:
+                # QPixmap은 GUI 스레드 밖에서 쓸 수 없으므로 여기서 QImage로 바꾼다
+                images[image_name] = image.toImage() if isinstance(image, QPixmap) else image
+        snapshots.append((html, images, passthrough, blob_images))
+    return snapshots
+
+
+def render_snapshots(snapshots, max_workers=None, blob_store=None):
+    # 모든 탭의 이미지를 한꺼번에 인코딩하고, 각 탭의 HTML을 한 번씩 다시 쓴다.
+    # blob_store를 주면 저장소에서 사라진 blob 참조는 문서의 이미지로 다시 인코딩한다.
+    # 저장과 같은 작업 스레드에서 확인해야 앞선 저장의 blob 정리 결과를 볼 수 있다.
+    images = {}
+    encoded_names = []
+    for index, (_, snapshot_images, _, blob_images) in enumerate(snapshots):
+        names = list(snapshot_images)
+        for image_name, image in snapshot_images.items():
+            images[(index, image_name)] = image
+        for image_name, image in blob_images.items():
+            if blob_store is not None and not blob_store.exists(image_name[len("blob:"):]):
+                images[(index, image_name)] = image
+                names.append(image_name)
+        encoded_names.append(names)
+
+    data_uris = encode_images(images, max_workers)
+
+    html_list = []
+    for index, (html, _, passthrough, _) in enumerate(snapshots):
+        replacements = {name: data_uris[(index, name)] for name in encoded_names[index]}
+        replacements.update(passthrough)
+        html_list.append(rewrite_image_sources(html, replacements))
+    return html_list
+
+
+def convert_editors_to_html(editors, max_workers=None):
+    return render_snapshots(snapshot_editors(editors), max_workers)
+
+
+def convert_images_to_base64(editor):
+    return convert_editors_to_html([editor])[0]
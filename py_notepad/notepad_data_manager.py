@@ -1,14 +1,68 @@
 import requests
-import json
 import os
 from urllib.parse import quote, unquote
 
+try:
+    from py_notepad.storage.blob_store import BlobStore
+    from py_notepad.storage.json_store import JsonTabStore
+    from py_notepad.storage.compressed_store import CompressedTabStore
+    from py_notepad.storage.container_store import ContainerTabStore
+    from py_notepad.storage.history_store import VersionHistory
+    from py_notepad.storage.tab_directory_store import TabDirectoryStore, new_tab_id, content_hash
+    from py_notepad.storage.sqlite_store import SqliteTabStore
+    from py_notepad.storage.journal_store import JournalTabStore
+    from py_notepad.storage.metadata import MetadataSidecar, build_metadata, file_signature
+    from py_notepad.storage.sync_state import TabSyncState
+    from py_notepad.transport import server_transport
+except ImportError:
+    from storage.blob_store import BlobStore
+    from storage.json_store import JsonTabStore
+    from storage.compressed_store import CompressedTabStore
+    from storage.container_store import ContainerTabStore
+    from storage.history_store import VersionHistory
+    from storage.tab_directory_store import TabDirectoryStore, new_tab_id, content_hash
+    from storage.sqlite_store import SqliteTabStore
+    from storage.journal_store import JournalTabStore
+    from storage.metadata import MetadataSidecar, build_metadata, file_signature
+    from storage.sync_state import TabSyncState
+    from transport import server_transport
+
 class NotePadDataManager:
-    def __init__(self, serial, local_file="tabs_data.json", server_url="http://192.168.5.118:9338", timeout=5):
+    def __init__(self, serial, local_file="tabs_data.json", server_url="http://192.168.5.118:9338", timeout=5,
+                 storage_format="json", history_versions=50, sync_mode="full", transport=None,
+                 history_interval=300):
         self.serial = serial
         self.local_file = local_file
         self.server_url = server_url
         self.timeout = timeout
+        # 서버 요청은 모두 연결을 재사용하는 공용 transport를 거친다
+        self.transport = transport or server_transport
+        self.storage_format = storage_format
+        self.store = self.create_store(storage_format)
+        self.metadata_sidecar = MetadataSidecar(os.path.splitext(local_file)[0] + ".meta.json")
+        # 이미지는 탭 본문에 인라인으로 두지 않고 해시 이름의 blob 파일로 한 번만 저장한다
+        self.blob_store = getattr(self.store, "blob_store", None) or BlobStore(os.path.splitext(local_file)[0] + "_blobs")
+        self.history = VersionHistory(os.path.splitext(local_file)[0] + "_history", max_versions=history_versions,
+                                      min_interval=history_interval)
+        # "full"은 노트 전체를 주고받고, "delta"는 탭별 해시와 버전으로 바뀐 탭만 주고받는다
+        self.sync_mode = sync_mode
+        self.sync_state = TabSyncState(os.path.splitext(local_file)[0] + ".sync.json")
+
+    def create_store(self, storage_format):
+        base_name = os.path.splitext(self.local_file)[0]
+        if storage_format == "tab_dir":
+            return TabDirectoryStore(base_name + ".d")
+        if storage_format == "sqlite":
+            return SqliteTabStore(base_name + ".sqlite3", self.serial)
+        if storage_format == "journal":
+            return JournalTabStore(base_name)
+        if storage_format == "container":
+            return ContainerTabStore(base_name + ".nbc", self.serial)
+        if storage_format == "compressed":
+            return CompressedTabStore(self.local_file)
+        if storage_format != "json":
+            print(f"Unknown storage format: {storage_format}, using json.")
+        return JsonTabStore(self.local_file)
 
     def sanitize_serial(self, serial: str) -> str:
         return quote(serial, safe='')
@@ -16,29 +70,153 @@ class NotePadDataManager:
     def unsanitize_serial(self, serial: str) -> str:
         return unquote(serial)
 
-    def save_to_local(self, data):
-        with open(self.local_file, "w", encoding='utf-8') as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
+    def save_to_local(self, data, force_history=True):
+        # id 없는 탭(예전 파일, 전체 동기화로 받은 서버 데이터)도 저장소와 버전 기록에서 구별되게 id를 붙인다
+        local_data = self.with_tab_ids(data)
+        local_data["tabs"] = [
+            dict(tab, content=self.blob_store.externalize_html(tab.get("content", "")))
+            for tab in local_data["tabs"]
+        ]
+        self.store.save(local_data)
+        if not hasattr(self.store, "load_metadata"):
+            self.metadata_sidecar.write(local_data, file_signature(self.store.content_files()))
+        try:
+            # blob 정리 전에 기록해야 이번 버전의 이미지가 기록 쪽으로 복사된다.
+            # 자동 저장(force_history=False)은 기록 간격이 지났을 때만 버전 기록을 남긴다.
+            self.history.record(local_data, self.blob_store, force=force_history)
+        except (OSError, ValueError) as e:
+            print(f"Failed to record version history: {e}")
+        self.blob_store.update_references(tab["content"] for tab in local_data["tabs"])
         print("Tabs saved locally successfully.")
+        return local_data
+
+    def with_tab_ids(self, data):
+        return dict(data, tabs=[dict(tab, id=tab.get("id") or new_tab_id()) for tab in data.get("tabs", [])])
 
     def load_from_local(self):
-        if os.path.exists(self.local_file):
-            with open(self.local_file, "r", encoding='utf-8') as file:
-                return json.load(file)
+        # 이미지는 blob 참조로 남겨 두고 편집기가 화면에 필요할 때 불러온다
+        if self.store.exists():
+            return self.store.load()
+        if not isinstance(self.store, (JsonTabStore, CompressedTabStore)):
+            # 새 형식으로 아직 저장한 적이 없으면 기존 tabs_data.json을 읽는다
+            return JsonTabStore(self.local_file).load()
         return None
 
-    def get_local_version(self):
+    def load_from_local_stream(self):
+        # 탭 목록을 generator로 돌려줘서 첫 탭을 파일 전체를 읽기 전에 띄울 수 있게 한다.
+        # version 등은 메타데이터에서 먼저 채워 둔다.
+        if not (hasattr(self.store, "load_stream") and self.store.exists()):
+            return self.load_from_local()
+        if hasattr(self.store, "read_tab"):
+            # 탭 하나씩 읽을 수 있는 저장소는 본문 없이 목록만 돌려주고 본문은 read_tab으로 읽게 한다
+            return self.store.load_metadata()
+        metadata = self.load_metadata()
+        if metadata is None:
+            return None
+        data = {key: value for key, value in metadata.items() if key != "tabs"}
+        data["tabs"] = self.store.load_stream(data)
+        return data
+
+    def read_tab(self, tab_id):
+        if hasattr(self.store, "read_tab"):
+            return self.store.read_tab(tab_id)
+        data = self.load_from_local() or {}
+        for tab in data.get("tabs", []):
+            if tab.get("id") == tab_id:
+                return tab.get("content", "")
+        return None
+
+    def read_tabs(self, tab_ids):
+        # 탭 단위로 읽을 수 없는 저장소는 전체를 한 번만 읽는다. 이런 저장소(기본 json 포함)는
+        # 저장할 때도 파일 전체를 다시 쓰므로, 바뀐 탭만 스냅샷해서 아끼는 것은 렌더링과 이미지 인코딩뿐이다.
+        if not tab_ids:
+            return {}
+        if hasattr(self.store, "read_tab"):
+            return {tab_id: self.store.read_tab(tab_id) for tab_id in tab_ids}
+        wanted = set(tab_ids)
+        data = self.load_from_local() or {}
+        return {tab.get("id"): tab.get("content", "") for tab in data.get("tabs", []) if tab.get("id") in wanted}
+
+    def materialize(self, data):
+        tabs = data.get("tabs", [])
+        if isinstance(tabs, list) and all("content" in tab for tab in tabs):
+            return data
+        # generator는 끝까지 읽고, 본문 없이 목록만 있는 탭은 저장소에서 본문을 채운다
+        tabs = [tab if "content" in tab else {"id": tab["id"], "title": tab.get("title", "New Tab"),
+                                              "content": self.read_tab(tab["id"]) or ""}
+                for tab in tabs]
+        return dict(data, tabs=tabs)
+
+    def inline_images(self, data):
+        inlined_data = dict(data)
+        inlined_data["tabs"] = [
+            dict(tab, content=self.blob_store.inline_html(tab.get("content", "")))
+            for tab in data.get("tabs", [])
+        ]
+        return inlined_data
+
+    def migrate_local_data(self, source_format="json"):
+        # 다른 형식으로 저장된 로컬 데이터를 현재 형식으로 옮긴다
+        source = NotePadDataManager(self.serial, self.local_file, self.server_url, self.timeout, source_format)
+        data = source.load_from_local()
+        if data is None:
+            return False
+        self.save_to_local(source.inline_images(data))
+        return True
+
+    def list_versions(self):
+        return self.history.versions()
+
+    def restore_tab_from_version(self, version, tab_id):
+        # 기록된 버전의 탭을 이미지까지 인라인해서 돌려준다. 편집기에 넣고 저장하면 새 버전이 된다.
+        tab = self.history.load_tab(version, tab_id)
+        if tab is None:
+            print(f"Tab {tab_id} not found in version {version}.")
+            return None
+        return dict(tab, content=self.history.blob_store.inline_html(tab["content"]))
+
+    def load_metadata(self):
+        # 버전, serial, 활성 탭, 탭 제목과 크기를 본문을 파싱하지 않고 읽는다
+        if hasattr(self.store, "load_metadata"):
+            metadata = self.store.load_metadata()
+            if metadata is not None:
+                return metadata
+        elif self.store.exists():
+            signature = file_signature(self.store.content_files())
+            metadata = self.metadata_sidecar.read(signature)
+            if metadata is not None:
+                return metadata
+            data = self.store.load()
+            if data is not None:
+                # 사이드카가 없거나 오래됐으면 한 번 전체를 읽어서 다시 만든다
+                return self.metadata_sidecar.write(data, signature)
         data = self.load_from_local()
         if data:
-            return data.get("version", 0)
+            return build_metadata(data)
+        return None
+
+    def get_local_version(self):
+        if hasattr(self.store, "load_version"):
+            version = self.store.load_version()
+            if version is not None:
+                return version
+        metadata = self.load_metadata()
+        if metadata:
+            return metadata.get("version", 0)
         return 0
 
-    def load_from_server(self):
+    def load_from_server(self, known_version=None):
+        # known_version을 주면 서버 버전이 같을 때 본문 없이 304만 받는다.
+        # 서버의 ETag는 따옴표로 감싼 노트 버전이다. If-None-Match를 모르는 서버는 그냥 전체를 보낸다.
         try:
             sanitized_serial = self.sanitize_serial(self.serial)
             sanitized_serial = self.sanitize_serial(sanitized_serial)
             print(f"Requesting load from server with sanitized serial: {sanitized_serial}")
-            response = requests.get(f"{self.server_url}/load_tabs/{sanitized_serial}", timeout=self.timeout)
+            headers = {"If-None-Match": f'"{known_version}"'} if known_version else {}
+            response = self.transport.get(f"{self.server_url}/load_tabs/{sanitized_serial}", "load_tabs",
+                                          timeout=self.timeout, headers=headers)
+            if response.status_code == 304:
+                return {"not_modified": True, "version": known_version}
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -46,8 +224,11 @@ class NotePadDataManager:
             return None
 
     def save_to_server(self, data):
+        if self.sync_mode == "delta":
+            return self.push_tab_changes(data)
         try:
-            response = requests.post(f"{self.server_url}/save_tabs/", json=data, timeout=self.timeout)
+            response = self.transport.post(f"{self.server_url}/save_tabs/", "save_tabs", timeout=self.timeout,
+                                           json=self.inline_images(data))
             response.raise_for_status()
             print("Tabs saved on server successfully.")
             return response.json()["version"]
@@ -55,33 +236,59 @@ class NotePadDataManager:
             print(f"Failed to save tabs on server: {e}")
             return None
 
+    def fetch_server_state(self, local_data=None):
+        # 동기화의 첫 요청. 로컬 저장소를 고치지 않으므로 저장과 따로 다른 스레드에서 불러도 된다.
+        # 결과는 apply_server_state에 넘긴다. 서버에 닿지 못하면 None이다.
+        if self.sync_mode == "delta":
+            return self.load_tab_manifest()
+        local_data = local_data if local_data is not None else self.load_metadata() or {}
+        known_version = local_data.get("version") if local_data.get("serial") == self.serial else None
+        return self.load_from_server(known_version)
+
     def sync_with_server(self, local_data):
-        server_data = self.load_from_server()
-        if server_data:
-            server_serial = self.unsanitize_serial(server_data["tabs_data"]["serial"])
+        return self.apply_server_state(local_data, self.fetch_server_state(local_data))
+
+    def apply_server_state(self, local_data, server_data):
+        if self.sync_mode == "delta":
+            return self.sync_tabs_with_server(local_data, server_data)
+        if server_data and server_data.get("not_modified"):
+            # 요청한 뒤에 로컬에서 저장했으면 로컬이 더 새 버전이다
+            if local_data.get("version", 0) > server_data["version"]:
+                local_data = self.push_local_data(local_data)
+            else:
+                print("Local and server data are in sync.")
+        elif server_data:
+            # 저장할 데이터와 돌려주는 데이터의 탭 id가 같아야 화면의 탭과 짝을 지을 수 있다
+            tabs_data = self.with_tab_ids(server_data["tabs_data"])
+            server_serial = self.unsanitize_serial(tabs_data["serial"])
             local_serial = local_data.get("serial", "")
             if server_serial == local_serial:
-                server_version = server_data["tabs_data"]["version"]
+                server_version = tabs_data["version"]
                 local_version = local_data.get("version", 0)
                 if server_version > local_version:
-                    self.save_to_local(server_data["tabs_data"])
-                    return server_data["tabs_data"]
+                    self.save_to_local(tabs_data)
+                    return tabs_data
                 elif server_version < local_version:
-                    updated_version = self.save_to_server(local_data)
-                    if updated_version:
-                        local_data["version"] = updated_version
-                        self.save_to_local(local_data)
+                    local_data = self.push_local_data(local_data)
                 else:
                     print("Local and server data are in sync.")
             else:
                 print("Server data is for different serial.")
                 #서버 데이터와 동기화
-                self.save_to_local(server_data["tabs_data"])
-                local_data = server_data["tabs_data"]
+                self.save_to_local(tabs_data)
+                local_data = tabs_data
         else:
             print("Using local data as server has no data or server is unreachable.")
         return local_data
 
+    def push_local_data(self, local_data):
+        local_data = self.with_tab_ids(self.materialize(local_data))
+        updated_version = self.save_to_server(local_data)
+        if updated_version:
+            local_data["version"] = updated_version
+            self.save_to_local(local_data)
+        return local_data
+
 
 
         #     if server_serial == local_serial:
@@ -105,13 +312,201 @@ class NotePadDataManager:
         #     print("Using local data as server has no data or server is unreachable.")
         # return local_data
 
+    def load_tab_manifest(self):
+        # 서버에 있는 탭들의 id, 제목, 해시, 버전만 받는다. 서버에 노트가 없으면 빈 목록을 돌려준다.
+        try:
+            sanitized_serial = self.sanitize_serial(self.sanitize_serial(self.serial))
+            response = self.transport.get(f"{self.server_url}/tabs_manifest/{sanitized_serial}", "tabs_manifest",
+                                          timeout=self.timeout)
+            if response.status_code == 404:
+                return {"serial": self.serial, "version": 0, "tabs": []}
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to load tab manifest from server: {e}")
+            return None
+
+    def fetch_tabs(self, tab_ids):
+        if not tab_ids:
+            return {}
+        try:
+            response = self.transport.post(f"{self.server_url}/fetch_tabs/", "fetch_tabs", timeout=self.timeout,
+                                           json={"serial": self.serial, "ids": tab_ids})
+            response.raise_for_status()
+            return {tab["id"]: tab for tab in response.json()["tabs"]}
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to fetch tabs from server: {e}")
+            return None
+
+    def push_tab_changes(self, data, server_tabs=None):
+        # 마지막 동기화 뒤에 바뀐 탭만 이미지를 인라인해서 보낸다. 서버의 탭 버전이 그 사이 바뀌었으면
+        # 서버는 그 탭을 충돌로 돌려주고, 다음 sync_tabs_with_server에서 처리된다.
+        state = self.sync_state.load(self.serial)
+        known_tabs = state["tabs"]
+        if server_tabs is None:
+            server_tabs = {tab_id: {"version": known["version"], "title": known["title"]}
+                           for tab_id, known in known_tabs.items()}
+        tabs = [dict(tab, id=tab.get("id") or new_tab_id()) for tab in self.materialize(data).get("tabs", [])]
+        local_hashes = {}
+        changed = []
+        titles = {}
+        for tab in tabs:
+            content = self.blob_store.externalize_html(tab.get("content", ""))
+            local_hashes[tab["id"]] = content_hash(content)
+            known = known_tabs.get(tab["id"])
+            server = server_tabs.get(tab["id"])
+            if known is None or known["local_hash"] != local_hashes[tab["id"]]:
+                changed.append({"id": tab["id"], "title": tab.get("title", "New Tab"),
+                                "content": self.blob_store.inline_html(content),
+                                "base_version": server["version"] if server else None})
+            elif server is None or server.get("title") != tab.get("title", "New Tab"):
+                titles[tab["id"]] = tab.get("title", "New Tab")
+        tab_ids = {tab["id"] for tab in tabs}
+        deleted = {tab_id: server["version"] for tab_id, server in server_tabs.items()
+                   if tab_id not in tab_ids and tab_id in known_tabs}
+        changes = {"serial": self.serial, "order": [tab["id"] for tab in tabs], "changed": changed,
+                   "deleted": deleted, "titles": titles, "active_tab_index": data.get("active_tab_index", 0)}
+        try:
+            response = self.transport.post(f"{self.server_url}/save_tab_changes/", "save_tab_changes",
+                                           timeout=self.timeout, json=changes)
+            response.raise_for_status()
+            result = response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to save tab changes on server: {e}")
+            return None
+
+        # 서버가 받아들인 탭의 상태만 고친다. 보내지 않은 탭의 상태를 서버 응답으로 덮으면
+        # 그 사이 다른 클라이언트가 바꾼 내용을 다음 동기화에서 받지 못한다.
+        conflicts = set(result.get("conflicts", []))
+        for tab in changed:
+            server = result["tabs"].get(tab["id"])
+            if tab["id"] in conflicts or server is None:
+                continue
+            known_tabs[tab["id"]] = {"local_hash": local_hashes[tab["id"]], "server_hash": server["hash"],
+                                     "version": server["version"], "title": tab["title"]}
+        for tab_id, title in titles.items():
+            if tab_id in known_tabs and tab_id in result["tabs"]:
+                known_tabs[tab_id]["title"] = title
+        # 로컬에 없는 탭은 서버에서도 지워졌을 때만 잊는다
+        for tab_id in set(known_tabs) - tab_ids:
+            if tab_id not in conflicts and tab_id not in result["tabs"]:
+                del known_tabs[tab_id]
+        state["version"] = result["version"]
+        self.sync_state.save(state)
+        print(f"Sent {len(changed)} changed tabs to server, {len(conflicts)} conflicts.")
+        return result["version"]
+
+    def sync_tabs_with_server(self, local_data, manifest):
+        # 서버 manifest와 마지막 동기화 상태를 비교해서 서버에서 바뀐 탭만 받고 로컬에서 바뀐 탭만 보낸다.
+        # 양쪽에서 모두 바뀐 탭은 로컬 내용을 유지하고 서버 내용을 "(server)" 탭으로 따로 남긴다.
+        state = self.sync_state.load(self.serial)
+        if manifest is not None and state.get("version", 0) > manifest.get("version", 0):
+            # manifest를 받은 뒤에 이 클라이언트가 변경을 올렸으면 다시 받는다
+            manifest = self.load_tab_manifest()
+        if manifest is None:
+            print("Using local data as server is unreachable.")
+            return local_data
+        local_data = self.materialize(local_data)
+        if not manifest["tabs"] and not manifest.get("version"):
+            # 서버에 노트가 없으면 지난 동기화 기록으로 로컬 탭을 지우지 않고 전부 새로 보낸다
+            state["tabs"] = {}
+        known_tabs = state["tabs"]
+        server_tabs = {tab["id"]: tab for tab in manifest["tabs"]}
+
+        tabs = []
+        pull_ids = []
+        conflict_ids = []
+        for tab in local_data.get("tabs", []):
+            tab = dict(tab, id=tab.get("id") or new_tab_id())
+            content = self.blob_store.externalize_html(tab.get("content", ""))
+            known = known_tabs.get(tab["id"])
+            server = server_tabs.get(tab["id"])
+            local_changed = known is None or known["local_hash"] != content_hash(content)
+            if server is None:
+                # 서버에서 지워졌고 로컬에서도 그대로면 로컬에서도 지운다
+                if known is not None and not local_changed:
+                    continue
+            elif known is None or known["server_hash"] != server["hash"]:
+                if local_changed and content_hash(self.blob_store.inline_html(content)) != server["hash"]:
+                    conflict_ids.append(tab["id"])
+                elif local_changed:
+                    # 내용이 이미 같으면 상태만 맞춘다
+                    known_tabs[tab["id"]] = {"local_hash": content_hash(content), "server_hash": server["hash"],
+                                             "version": server["version"], "title": server["title"]}
+                else:
+                    pull_ids.append(tab["id"])
+            elif known["title"] != server["title"] and known["title"] == tab.get("title", "New Tab"):
+                tab["title"] = server["title"]
+                known["title"] = server["title"]
+            tabs.append(tab)
+
+        local_ids = {tab["id"] for tab in tabs}
+        for tab_id, server in server_tabs.items():
+            known = known_tabs.get(tab_id)
+            if tab_id in local_ids or (known is not None and known["server_hash"] == server["hash"]):
+                continue
+            # 서버에 새로 생긴 탭, 또는 로컬에서 지웠지만 서버에서 바뀐 탭은 받아 온다
+            tabs.append({"id": tab_id, "title": server["title"]})
+            pull_ids.append(tab_id)
+
+        fetched = self.fetch_tabs(pull_ids + conflict_ids)
+        if fetched is None:
+            return local_data
+        by_id = {tab["id"]: tab for tab in tabs}
+        for tab_id in pull_ids:
+            server = fetched.get(tab_id)
+            if server is None:
+                continue
+            content = self.blob_store.externalize_html(server["content"])
+            by_id[tab_id].update(title=server["title"], content=content)
+            known_tabs[tab_id] = {"local_hash": content_hash(content), "server_hash": server["hash"],
+                                  "version": server["version"], "title": server["title"]}
+        for tab_id in conflict_ids:
+            server = fetched.get(tab_id)
+            if server is not None:
+                # 서버 쪽 내용은 새 탭으로 남기고, 로컬 내용이 서버 버전을 덮어쓰게 한다
+                index = tabs.index(by_id[tab_id])
+                tabs.insert(index + 1, {"id": new_tab_id(), "title": f"{server['title']} (server)",
+                                        "content": self.blob_store.externalize_html(server["content"])})
+                known_tabs.pop(tab_id, None)
+        tabs = self.order_like_server([tab for tab in tabs if "content" in tab], manifest["tabs"])
+        self.sync_state.save(state)
+
+        print(f"Fetched {len(pull_ids)} tabs from server, {len(conflict_ids)} conflicts.")
+        synced_data = dict(local_data, serial=self.serial, tabs=tabs,
+                           version=max(local_data.get("version", 0), manifest.get("version", 0)))
+        server_order = [tab["id"] for tab in manifest["tabs"]]
+        if [tab["id"] for tab in tabs] != server_order or any(
+                known_tabs.get(tab["id"], {}).get("local_hash") != content_hash(tab["content"])
+                or known_tabs[tab["id"]]["title"] != tab.get("title", "New Tab") for tab in tabs):
+            version = self.push_tab_changes(synced_data, server_tabs)
+            if version is not None:
+                synced_data["version"] = max(synced_data["version"], version)
+        if pull_ids or conflict_ids or synced_data["version"] != local_data.get("version", 0) \
+                or len(tabs) != len(local_data.get("tabs", [])):
+            self.save_to_local(synced_data)
+        return synced_data
+
+    def order_like_server(self, tabs, server_tabs):
+        # 서버에 있는 탭은 서버 순서를 따르고, 로컬에만 있는 탭은 로컬에서 바로 앞에 있던 탭 뒤에 둔다.
+        # 로컬에서 바꾼 순서는 저장할 때 push_tab_changes로 서버에 올라간다.
+        position = {tab["id"]: index for index, tab in enumerate(server_tabs)}
+        ordered = sorted((tab for tab in tabs if tab["id"] in position), key=lambda tab: position[tab["id"]])
+        previous = None
+        for tab in tabs:
+            if tab["id"] not in position:
+                index = next(i for i, other in enumerate(ordered) if other is previous) + 1 if previous else 0
+                ordered.insert(index, tab)
+            previous = tab
+        return ordered
+
     def sync_on_startup(self):
-        local_data = self.load_from_local() or {"version": 0}
+        local_data = self.load_from_local_stream() or {"version": 0}
         return self.sync_with_server(local_data)
 
     def get_serials_from_server(self):
         try:
-            response = requests.get(f"{self.server_url}/list_serials/", timeout=self.timeout)
+            response = self.transport.get(f"{self.server_url}/list_serials/", "list_serials", timeout=self.timeout)
             response.raise_for_status()
             return [self.unsanitize_serial(serial) for serial in response.json().get("serials", [])]
         except requests.exceptions.RequestException as e:
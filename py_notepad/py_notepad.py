@@ -1,13 +1,15 @@
 import sys
 import os
 import json
-import base64
-import re
 from PyQt5.QtWidgets import QApplication, QMainWindow, QTextEdit, QTabWidget, QTabBar, QAction, QFileDialog, QMenu, \
     QInputDialog, QFontComboBox, QToolBar, QComboBox, QToolButton, QMessageBox
-from PyQt5.QtGui import QIcon, QImage, QTextCursor, QKeySequence, QFont, QTextDocument, QTextCharFormat, \
-    QTextImageFormat
-from PyQt5.QtCore import Qt, QBuffer, QByteArray, QUrl
+from PyQt5.QtGui import QIcon, QKeySequence, QFont
+from PyQt5.QtCore import Qt
+
+try:
+    from py_notepad.image_handler.image_serializer import convert_images_to_base64
+except ImportError:
+    from image_handler.image_serializer import convert_images_to_base64
 
 
 class Notepad(QMainWindow):
@@ -276,42 +278,7 @@ class Notepad(QMainWindow):
             self.new_tab()
 
     def convert_images_to_base64(self, editor):
-        doc = editor.document()
-        html = editor.toHtml()
-        image_format = QTextImageFormat()
-        cursor = QTextCursor(doc)
-
-        block = doc.begin()
-        while block != doc.end():
-            block_cursor = QTextCursor(block)
-            block_cursor.movePosition(QTextCursor.StartOfBlock)
-
-            while block_cursor.position() < block.position() + block.length() - 1:
-                block_cursor.movePosition(QTextCursor.NextCharacter, QTextCursor.KeepAnchor)
-                char_format = block_cursor.charFormat()
-
-                if char_format.isImageFormat():
-                    image_format = char_format.toImageFormat()
-                    image_name = image_format.name()
-                    image_url = QUrl(image_name)
-                    image = doc.resource(QTextDocument.ImageResource, image_url)
-
-                    if image is not None:
-                        buffer = QBuffer()
-                        buffer.open(QBuffer.ReadWrite)
-                        image.save(buffer, "PNG")
-                        base64_data = base64.b64encode(buffer.data()).decode()
-                        new_image_tag = f'<img src="data:image/png;base64,{base64_data}"/>'
-
-                        # Use regex to replace the old image tag with the new one
-                        pattern = re.escape(f'<img src="{image_name}"')
-                        html = re.sub(pattern + r'([^>]*>)', new_image_tag, html)
-
-                block_cursor.clearSelection()
-
-            block = block.next()
-
-        return html
+        return convert_images_to_base64(editor)
 
 
 class CustomTextEdit(QTextEdit):
@@ -1,19 +1,49 @@
 import sys
 import json
-import base64
-import re
 from datetime import datetime
 
-import requests
 from PyQt5.QtWidgets import QApplication, QMainWindow, QTextEdit, QTabWidget, QTabBar, QAction, QFileDialog, QMenu, QInputDialog, QFontComboBox, QToolBar, QComboBox, QToolButton, QMessageBox, QVBoxLayout, QWidget, QMenuBar, QColorDialog
-from PyQt5.QtGui import QIcon, QTextCursor, QKeySequence, QFont, QTextDocument, QTextCharFormat, QTextImageFormat, QColor, QPixmap
-from PyQt5.QtCore import Qt, QBuffer, QByteArray, QUrl, QTimer
+from PyQt5.QtGui import QIcon, QKeySequence, QFont, QTextCharFormat, QColor, QPixmap
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 
 try:
     from py_notepad.notepad_data_manager import NotePadDataManager
 except ImportError:
     from notepad_data_manager import NotePadDataManager
 
+try:
+    from py_notepad.image_handler.image_serializer import convert_images_to_base64, set_storage_policy
+    from py_notepad.image_handler.image_policy import ImageStoragePolicy
+    from py_notepad.image_handler.image_resolver import image_resolver
+except ImportError:
+    from image_handler.image_serializer import convert_images_to_base64, set_storage_policy
+    from image_handler.image_policy import ImageStoragePolicy
+    from image_handler.image_resolver import image_resolver
+
+try:
+    from py_notepad.storage.tab_directory_store import new_tab_id, content_hash
+except ImportError:
+    from storage.tab_directory_store import new_tab_id, content_hash
+
+try:
+    from py_notepad.transport import server_transport
+except ImportError:
+    from transport import server_transport
+
+try:
+    from py_notepad.save_pipeline import SavePipeline
+    from py_notepad.autosave import AutosaveScheduler
+    from py_notepad.connection_monitor import ConnectionMonitor
+except ImportError:
+    from save_pipeline import SavePipeline
+    from autosave import AutosaveScheduler
+    from connection_monitor import ConnectionMonitor
+
+try:
+    from py_notepad.custom_text_edit import CustomTextEdit as ImageTextEdit
+except ImportError:
+    from custom_text_edit import CustomTextEdit as ImageTextEdit
+
 try:
     from py_notepad import resources_rc
 except ImportError:
@@ -23,6 +53,15 @@ class NotepadWidget(QWidget):
     def __init__(self, data_manager: NotePadDataManager):
         super().__init__()
         self.data_manager = data_manager
+        self.loading_tabs = False
+        # id 없이 불러와서 첫 동기화 결과를 기다리는 탭
+        self.unsaved_tab_ids = set()
+        self.save_pipeline = SavePipeline(self)
+        self.autosave = AutosaveScheduler(self.autosave_tabs, self.upload_tabs, parent=self)
+        # 저장이 실패하면 다음 자동 저장에서 모든 탭을 다시 스냅샷한다
+        self.save_pipeline.failed.connect(lambda message: self.mark_all_tabs_dirty())
+        self.save_pipeline.synced.connect(self.apply_synced_data)
+        self.save_pipeline.finished.connect(self.update_saved_hashes)
 
         layout = QVBoxLayout(self)
         self.setLayout(layout)
@@ -39,6 +78,9 @@ class NotepadWidget(QWidget):
         self.tabs.tabCloseRequested.connect(self.check_and_close_tab)
         self.tabs.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tabs.customContextMenuRequested.connect(self.show_tab_context_menu)
+        self.tabs.currentChanged.connect(self.load_tab_content)
+        self.tabs.tabBar().tabMoved.connect(lambda source, target: self.autosave.mark_structure_changed())
+        self.tabs.tabBar().tab_renamed.connect(lambda index: self.autosave.mark_structure_changed())
         layout.addWidget(self.tabs)
 
         # Add "탭 추가" Button
@@ -127,24 +169,15 @@ class NotepadWidget(QWidget):
         toolbar.addAction(refresh_action)
 
     def refresh_tabs(self):
+        # 화면은 그대로 두고 서버와 맞춘 뒤 바뀐 탭만 반영한다
         print("Refreshing tabs...")
-        try:
-            data = self.data_manager.sync_on_startup()
-        except Exception as e:
-            print(f"Failed to sync with server on refresh: {e}")
-            data = self.data_manager.load_from_local() or {"tabs": [], "active_tab_index": 0}
-
-        # 기본 값 설정
-        if "tabs" not in data:
-            data["tabs"] = []
-        if "active_tab_index" not in data:
-            data["active_tab_index"] = 0
-
-        self.load_tabs_from_data(data)
-        print("Tabs refreshed successfully.")
+        self.save_pipeline.sync(self.data_manager)
 
-    def new_tab(self, content="", title="New Tab"):
+    def new_tab(self, content="", title="New Tab", tab_id=None):
         editor = CustomTextEdit()
+        editor.tab_id = tab_id or new_tab_id()
+        # 서버 동기화 결과와 비교해서 본문이 바뀐 탭만 다시 그리기 위한 값
+        editor.synced_hash = content_hash(content)
 
         if content == "":
             now = datetime.now()
@@ -156,8 +189,29 @@ class NotepadWidget(QWidget):
             editor.setHtml(content)
 
         index = self.tabs.addTab(editor, title)
+        self.autosave.watch(editor)
+        if not self.loading_tabs:
+            self.autosave.mark_dirty(editor.tab_id)
         self.tabs.setCurrentIndex(index)
 
+    def new_lazy_tab(self, title, tab_id):
+        # 본문은 탭이 처음 선택될 때 data manager에서 읽는다
+        editor = CustomTextEdit()
+        editor.tab_id = tab_id
+        editor.content_loaded = False
+        self.tabs.addTab(editor, title)
+
+    def load_tab_content(self, index):
+        editor = self.tabs.widget(index)
+        if self.loading_tabs or getattr(editor, "content_loaded", True):
+            return
+        content = self.data_manager.read_tab(editor.tab_id) or ""
+        editor.setHtml(content)
+        editor.synced_hash = content_hash(content)
+        editor.content_loaded = True
+        # 본문을 넣은 뒤에 감시를 시작해야 불러온 것만으로 저장 대상이 되지 않는다
+        self.autosave.watch(editor)
+
     def new_tab_right(self, index):
         self.new_tab()
         self.tabs.tabBar().moveTab(self.tabs.count() - 1, index + 1)
@@ -180,6 +234,7 @@ class NotepadWidget(QWidget):
         return f"{base_title}_{max_suffix}"
 
     def duplicate_tab_right(self, index):
+        self.load_tab_content(index)
         current_editor = self.tabs.widget(index)
         if isinstance(current_editor, QTextEdit):
             html_content = current_editor.toHtml()
@@ -191,6 +246,7 @@ class NotepadWidget(QWidget):
             self.tabs.setTabText(index + 1, new_title)
 
     def duplicate_tab_left(self, index):
+        self.load_tab_content(index)
         current_editor = self.tabs.widget(index)
         if isinstance(current_editor, QTextEdit):
             html_content = current_editor.toHtml()
@@ -201,7 +257,28 @@ class NotepadWidget(QWidget):
             new_editor.setHtml(html_content)
             self.tabs.setTabText(index, new_title)
 
+    def restore_tab_from_version(self, index):
+        self.load_tab_content(index)
+        editor = self.tabs.widget(index)
+        versions = self.data_manager.list_versions()
+        if not versions:
+            QMessageBox.information(self, 'Restore Tab', 'No saved versions are available.')
+            return
+        labels = [f"Version {entry['version']} - "
+                  f"{datetime.fromtimestamp(entry['saved_at']).strftime('%Y-%m-%d %H:%M:%S')}"
+                  for entry in versions]
+        label, ok = QInputDialog.getItem(self, "Restore Tab", "Version:", labels, 0, False)
+        if not ok:
+            return
+        tab = self.data_manager.restore_tab_from_version(versions[labels.index(label)]["version"], editor.tab_id)
+        if tab is None:
+            QMessageBox.warning(self, 'Restore Tab', 'This tab does not exist in the selected version.')
+            return
+        editor.setHtml(tab["content"])
+        self.tabs.setTabText(index, tab["title"])
+
     def check_and_close_tab(self, index):
+        self.load_tab_content(index)
         editor = self.tabs.widget(index)
         if isinstance(editor, QTextEdit):
             if editor.toPlainText().strip():
@@ -215,6 +292,7 @@ class NotepadWidget(QWidget):
 
     def close_tab(self, index):
         self.tabs.removeTab(index)
+        self.autosave.mark_structure_changed()
         if self.tabs.count() == 0:
             self.new_tab()
 
@@ -234,7 +312,7 @@ class NotepadWidget(QWidget):
         if file_name:
             editor = self.tabs.currentWidget()
             if isinstance(editor, QTextEdit):
-                html_content = self.convert_images_to_base64(editor)
+                html_content = self.data_manager.blob_store.inline_html(self.convert_images_to_base64(editor))
                 with open(file_name, 'w', encoding='utf-8') as file:
                     file.write(html_content)
 
@@ -259,6 +337,10 @@ class NotepadWidget(QWidget):
             new_tab_left_action.triggered.connect(lambda: self.new_tab_left(index))
             menu.addAction(new_tab_left_action)
 
+            restore_action = QAction("Restore from Version...", self)
+            restore_action.triggered.connect(lambda: self.restore_tab_from_version(index))
+            menu.addAction(restore_action)
+
             close_action = QAction("Close Tab", self)
             close_action.triggered.connect(lambda: self.check_and_close_tab(index))
             menu.addAction(close_action)
@@ -311,45 +393,87 @@ class NotepadWidget(QWidget):
         pixmap.fill(color)
         self.color_action.setIcon(QIcon(pixmap))
 
-    def save_tabs(self):
-        print("Saving tabs...")
-        tabs_data = []
+    def tab_editors(self):
+        editors = []
+        titles = []
         for index in range(self.tabs.count()):
             editor = self.tabs.widget(index)
             if isinstance(editor, QTextEdit):
-                html_content = self.convert_images_to_base64(editor)
-                title = self.tabs.tabText(index)
-                tabs_data.append({"title": title, "content": html_content})
-
-        # Save the active tab index
-        active_tab_index = self.tabs.currentIndex()
+                editors.append(editor)
+                titles.append(self.tabs.tabText(index))
+        return editors, titles
 
-        data_to_save = {
-            "serial": self.data_manager.serial,
-            "active_tab_index": active_tab_index,
-            "tabs": tabs_data,
-            "version": self.data_manager.get_local_version() + 1
-        }
-
-        self.data_manager.save_to_local(data_to_save)
-        self.data_manager.save_to_server(data_to_save)
+    def save_tabs(self):
+        if self.loading_tabs:
+            print("Tabs are still loading, save skipped.")
+            return
+        print("Saving tabs...")
+        editors, titles = self.tab_editors()
+        self.autosave.take_dirty()
+        self.autosave.uploaded()
+
+        # 문서 스냅샷만 여기서 만들고 이미지 인코딩, 로컬 저장, 업로드는 작업 스레드에서 한다
+        self.save_pipeline.save(self.data_manager, editors, titles, self.tabs.currentIndex())
+
+    def autosave_tabs(self, dirty_tabs, upload):
+        if self.loading_tabs:
+            return False
+        if self.unsaved_tab_ids:
+            # 예전 노트는 서버가 더 새로우면 동기화 결과로 바뀌므로 그 전에 오래된 로컬 노트를 올리지 않는다
+            return False
+        print(f"Autosaving {len(dirty_tabs)} changed tabs...")
+        editors, titles = self.tab_editors()
+        self.save_pipeline.save(self.data_manager, editors, titles, self.tabs.currentIndex(),
+                                upload=upload, tab_ids=dirty_tabs, force_history=False)
+        return True
+
+    def upload_tabs(self):
+        self.save_pipeline.upload(self.data_manager)
+
+    def mark_all_tabs_dirty(self):
+        for editor in self.tab_editors()[0]:
+            if getattr(editor, "content_loaded", True):
+                self.autosave.mark_dirty(editor.tab_id)
 
     def load_tabs_from_data(self, data):
+        # blob: 이미지는 현재 data manager의 저장소에서 필요할 때 읽어 온다
+        image_resolver.blob_store = self.data_manager.blob_store
         self.tabs.clear()
         tabs_data = data.get("tabs", [])
-        for tab in tabs_data:
-            self.new_tab(tab.get("content", ""), tab.get("title", "New Tab"))
+        # tabs가 generator이면 파일을 읽는 대로 탭을 만든다. 첫 탭은 바로 화면에 그린다.
+        self.loading_tabs = True
+        unsaved_ids = []
+        try:
+            for tab in tabs_data:
+                if "content" not in tab and tab.get("id"):
+                    self.new_lazy_tab(tab.get("title", "New Tab"), tab["id"])
+                    continue
+                self.new_tab(tab.get("content", ""), tab.get("title", "New Tab"), tab.get("id"))
+                if not tab.get("id"):
+                    unsaved_ids.append(self.tabs.widget(self.tabs.count() - 1).tab_id)
+                if self.tabs.count() == 1:
+                    QApplication.processEvents()
+        finally:
+            self.loading_tabs = False
 
         # Restore the active tab index
-        active_tab_index = data.get("active_tab_index", 0)
+        active_tab_index = data.get("active_tab_index") or 0
         self.tabs.setCurrentIndex(active_tab_index)
+        self.load_tab_content(self.tabs.currentIndex())
+        # 방금 불러온 내용은 저장된 상태와 같다
+        self.autosave.take_dirty()
+        # id 없이 저장돼 있던 탭(예전 tabs_data.json)은 여기서 새 id를 받았으므로 저장소에서 찾을 수 없다.
+        # 뒤따르는 동기화가 서버 데이터로 바꾸거나 저장 대상으로 표시할 때까지 자동 저장을 미룬다.
+        self.unsaved_tab_ids = set(unsaved_ids)
 
     def load_or_create_initial_tab(self):
+        # 로컬 데이터를 바로 보여 주고 서버 동기화는 작업 스레드에서 한다
+        self.save_pipeline.wait()
         try:
-            data = self.data_manager.sync_on_startup()
+            data = self.data_manager.load_from_local_stream() or {"tabs": [], "active_tab_index": 0}
         except Exception as e:
-            print(f"Failed to sync with server on startup: {e}")
-            data = self.data_manager.load_from_local() or {"tabs": [], "active_tab_index": 0}
+            print(f"Failed to load local data on startup: {e}")
+            data = {"tabs": [], "active_tab_index": 0}
 
         # 기본 값 설정
         if "tabs" not in data:
@@ -358,46 +482,88 @@ class NotepadWidget(QWidget):
             data["active_tab_index"] = 0
 
         self.load_tabs_from_data(data)
+        self.save_pipeline.sync(self.data_manager)
+
+    def apply_synced_data(self, data_manager, data):
+        # 동기화하는 동안 설정이 바뀌어 data manager가 달라졌으면 결과를 버린다
+        if data_manager is not self.data_manager:
+            return
+        unsaved_ids, self.unsaved_tab_ids = self.unsaved_tab_ids, set()
+        tabs_data = data.get("tabs", []) if data is not None else []
+        if data is None or any(not tab.get("id") for tab in tabs_data):
+            # 서버 데이터는 저장할 때 id를 받으므로 id 없는 탭은 이미 화면에 그린 로컬 데이터 그대로다.
+            # id 없이 불러온 탭은 이제 저장해서 id를 함께 기록한다.
+            for tab_id in unsaved_ids:
+                self.autosave.mark_dirty(tab_id)
+            return
+
+        # 동기화하는 동안 사용자가 고친 탭과 탭 구성은 그대로 두고 다음 저장에서 올린다.
+        # id 없이 불러온 탭은 저장소의 어떤 탭과도 짝이 맞지 않으므로 고치지 않았으면 서버 데이터로 바꾼다.
+        # 그동안 자동 저장이 미뤄지며 구성 변경으로 표시됐으므로 탭 구성도 서버 데이터를 따른다.
+        dirty_tabs = set(self.autosave.dirty_tabs)
+        keep_structure = self.autosave.structure_changed and not unsaved_ids
+        editors = {editor.tab_id: editor for editor in self.tab_editors()[0]}
+        current = self.tabs.currentWidget()
+        changed = 0
+        self.loading_tabs = True
+        self.autosave.paused = True
+        try:
+            for position, tab in enumerate(tabs_data):
+                title = tab.get("title", "New Tab")
+                editor = editors.pop(tab["id"], None)
+                if editor is None:
+                    if "content" in tab:
+                        self.new_tab(tab["content"], title, tab["id"])
+                    else:
+                        self.new_lazy_tab(title, tab["id"])
+                    editor = self.tabs.widget(self.tabs.count() - 1)
+                    changed += 1
+                elif editor.tab_id not in dirty_tabs and self.update_synced_tab(editor, tab):
+                    changed += 1
+                if keep_structure:
+                    continue
+                index = self.tabs.indexOf(editor)
+                if self.tabs.tabText(index) != title:
+                    self.tabs.setTabText(index, title)
+                    changed += 1
+                if index != position:
+                    self.tabs.tabBar().moveTab(index, position)
+            if not keep_structure:
+                for editor in editors.values():
+                    if editor.tab_id not in dirty_tabs:
+                        self.tabs.removeTab(self.tabs.indexOf(editor))
+                        editor.deleteLater()
+                        changed += 1
+            if current is not None and self.tabs.indexOf(current) != -1:
+                self.tabs.setCurrentWidget(current)
+        finally:
+            self.loading_tabs = False
+            self.autosave.paused = False
+        self.load_tab_content(self.tabs.currentIndex())
+        print(f"Synced with server: {changed} tab changes applied.")
+
+    def update_saved_hashes(self, result):
+        # 저장한 본문을 기준으로 삼아야 다음 동기화에서 자기가 저장한 내용을 바뀐 것으로 보지 않는다
+        hashes = result.get("hashes", {})
+        for editor in self.tab_editors()[0]:
+            if editor.tab_id in hashes:
+                editor.synced_hash = hashes[editor.tab_id]
+
+    def update_synced_tab(self, editor, tab):
+        # 아직 열지 않은 탭은 처음 열 때 저장소에서 새 본문을 읽는다
+        if "content" not in tab or not getattr(editor, "content_loaded", True):
+            return False
+        tab_hash = content_hash(tab["content"])
+        if tab_hash == getattr(editor, "synced_hash", None):
+            return False
+        editor.setHtml(tab["content"])
+        editor.synced_hash = tab_hash
+        return True
 
     def convert_images_to_base64(self, editor):
-        doc = editor.document()
-        html = editor.toHtml()
-        image_format = QTextImageFormat()
-        cursor = QTextCursor(doc)
-
-        block = doc.begin()
-        while block != doc.end():
-            block_cursor = QTextCursor(block)
-            block_cursor.movePosition(QTextCursor.StartOfBlock)
-
-            while block_cursor.position() < block.position() + block.length() - 1:
-                block_cursor.movePosition(QTextCursor.NextCharacter, QTextCursor.KeepAnchor)
-                char_format = block_cursor.charFormat()
+        return convert_images_to_base64(editor)
 
-                if char_format.isImageFormat():
-                    image_format = char_format.toImageFormat()
-                    image_name = image_format.name()
-                    image_url = QUrl(image_name)
-                    image = doc.resource(QTextDocument.ImageResource, image_url)
-
-                    if image is not None:
-                        buffer = QBuffer()
-                        buffer.open(QBuffer.ReadWrite)
-                        image.save(buffer, "PNG")
-                        base64_data = base64.b64encode(buffer.data()).decode()
-                        new_image_tag = f'<img src="data:image/png;base64,{base64_data}"/>'
-
-                        # Use regex to replace the old image tag with the new one
-                        pattern = re.escape(f'<img src="{image_name}"')
-                        html = re.sub(pattern + r'([^>]*>)', new_image_tag, html)
-
-                block_cursor.clearSelection()
-
-            block = block.next()
-
-        return html
-
-class CustomTextEdit(QTextEdit):
+class CustomTextEdit(ImageTextEdit):
     def __init__(self):
         super().__init__()
         self.setFont(QFont("맑은 고딕", 12))
@@ -415,18 +581,17 @@ class CustomTextEdit(QTextEdit):
     def paste_image(self):
         clipboard = QApplication.clipboard()
         if clipboard.mimeData().hasImage():
-            image = clipboard.image()
-            cursor = self.textCursor()
-            cursor.insertImage(image)
+            self.insertFromMimeData(clipboard.mimeData())
 
     def contextMenuEvent(self, event):
         menu = self.createStandardContextMenu()
         paste_action = menu.addAction("Paste Image")
         paste_action.triggered.connect(self.paste_image)
 
-        if not QApplication.clipboard.mimeData().hasImage():
+        if not QApplication.clipboard().mimeData().hasImage():
             paste_action.setEnabled(False)
 
+        self.add_image_actions(menu, event.pos())
         menu.exec_(event.globalPos())
 
 class CustomTabWidget(QTabWidget):
@@ -435,6 +600,8 @@ class CustomTabWidget(QTabWidget):
         self.setTabBar(CustomTabBar(self))
 
 class CustomTabBar(QTabBar):
+    tab_renamed = pyqtSignal(int)
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -450,18 +617,24 @@ class CustomTabBar(QTabBar):
         new_name, ok = QInputDialog.getText(self, "Edit Tab Name", "New Tab Name:", text=current_name)
         if ok and new_name:
             self.setTabText(index, new_name)
+            self.tab_renamed.emit(index)
 
 class NotepadMainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.settings = self.load_settings()
+        set_storage_policy(ImageStoragePolicy.from_settings(self.settings))
+        self.configure_transport()
         self.data_manager = NotePadDataManager(
             serial=self.settings.get("serial", "default_serial"),
             local_file=self.settings.get("local_file", "tabs_data.json"),
             server_url=self.settings.get("server_url", "http://192.168.5.118:9338"),
-            timeout=1  # 타임아웃 설정
+            timeout=1,  # 타임아웃 설정
+            storage_format=self.settings.get("storage_format", "json"),
+            sync_mode=self.settings.get("sync_mode", "full")
         )
         self.notepad_widget = NotepadWidget(self.data_manager)
+        self.configure_autosave()
         self.setCentralWidget(self.notepad_widget)
         self.setWindowTitle("HTML Notepad")
         self.setGeometry(100, 100, 800, 600)
@@ -469,6 +642,16 @@ class NotepadMainWindow(QMainWindow):
         # 상태 표시줄 추가
         self.status_bar = self.statusBar()
         self.status_bar.showMessage("Ready")
+        self.notepad_widget.save_pipeline.progress.connect(
+            lambda message, percent: self.status_bar.showMessage(f"{message} ({percent}%)"))
+        self.notepad_widget.save_pipeline.finished.connect(
+            lambda result: self.status_bar.showMessage(f"Saved version {result['version']}", 5000))
+        self.notepad_widget.save_pipeline.failed.connect(
+            lambda message: self.status_bar.showMessage(f"Save failed: {message}"))
+
+        # 연결 상태 확인. 서버 주소는 설정을 적용할 때 정해지고 그때부터 확인을 시작한다.
+        self.connection_monitor = ConnectionMonitor(parent=self)
+        self.connection_monitor.checked.connect(self.show_connection_status)
 
         # Add settings action
         self.settings_action = QAction("Settings", self)
@@ -480,11 +663,8 @@ class NotepadMainWindow(QMainWindow):
 
         # Show current settings
         self.show_current_settings()
-
-        # 주기적으로 연결 상태 확인
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.check_server_connection)
-        self.timer.start(10000)  # 10초마다 확인
+        if self.connection_monitor.server_url is None:
+            self.configure_connection_monitor()
 
     def load_settings(self):
         try:
@@ -502,26 +682,42 @@ class NotepadMainWindow(QMainWindow):
         dialog = SettingsDialog(self.settings, self.data_manager, self)
         if dialog.exec_():
             self.save_settings()
+            set_storage_policy(ImageStoragePolicy.from_settings(self.settings))
+            self.configure_transport()
             self.data_manager = NotePadDataManager(
                 serial=self.settings.get("serial"),
                 local_file=self.settings.get("local_file"),
                 server_url=self.settings.get("server_url"),
-                timeout=1  # 타임아웃 설정
+                timeout=1,  # 타임아웃 설정
+                storage_format=self.settings.get("storage_format", "json"),
+                sync_mode=self.settings.get("sync_mode", "full")
             )
             self.notepad_widget.data_manager = self.data_manager
+            self.configure_autosave()
+            self.configure_connection_monitor()
             self.notepad_widget.load_or_create_initial_tab()
             self.show_current_settings()
 
+    def configure_transport(self):
+        server_transport.configure(pool_size=self.settings.get("http_pool_size", 4),
+                                   retries=self.settings.get("http_retries", 2))
+
+    def configure_autosave(self):
+        # 0이면 자동 저장을 끈다
+        self.notepad_widget.autosave.configure(self.settings.get("autosave_delay_ms", 2000),
+                                               self.settings.get("upload_interval_s", 60) * 1000)
+
     def show_current_settings(self):
         settings_text = f"Serial: {self.settings.get('serial', '')} | Local File: {self.settings.get('local_file', '')} | Server URL: {self.settings.get('server_url', '')}"
         self.setWindowTitle(f"HTML Notepad - {settings_text}")
 
-    def check_server_connection(self):
-        try:
-            response = requests.get(f"{self.settings.get('server_url')}/list_serials/", timeout=self.data_manager.timeout)
-            response.raise_for_status()
+    def configure_connection_monitor(self):
+        self.connection_monitor.set_server_url(self.data_manager.server_url, self.data_manager.timeout)
+
+    def show_connection_status(self, connected):
+        if connected:
             self.status_bar.showMessage("Connected to server")
-        except requests.exceptions.RequestException:
+        else:
             self.status_bar.showMessage("Failed to connect to server")
 
     def closeEvent(self, event):
@@ -530,9 +726,16 @@ class NotepadMainWindow(QMainWindow):
                                      QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Cancel)
 
         if reply == QMessageBox.Yes:
+            # 대기 중인 자동 저장, 업로드, 동기화는 마지막 전체 저장이 대신한다
+            self.notepad_widget.save_pipeline.cancel_pending()
             self.notepad_widget.save_tabs()
+            # 창을 닫기 전에 진행 중인 저장이 끝날 때까지 기다린다
+            self.notepad_widget.save_pipeline.wait()
             event.accept()
         elif reply == QMessageBox.No:
+            # 저장하지 않고 닫으므로 대기 중인 작업은 버리고 이미 실행 중인 작업만 기다린다
+            self.notepad_widget.save_pipeline.cancel_pending()
+            self.notepad_widget.save_pipeline.wait()
             event.accept()
         else:
             event.ignore()
@@ -0,0 +1,214 @@
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+try:
+    from py_notepad.image_handler.image_serializer import snapshot_editors, render_snapshots
+    from py_notepad.storage.tab_directory_store import content_hash
+except ImportError:
+    from image_handler.image_serializer import snapshot_editors, render_snapshots
+    from storage.tab_directory_store import content_hash
+
+
+class SaveSignals(QObject):
+    # 작업 스레드에서 emit하면 GUI 스레드의 슬롯으로 큐를 거쳐 전달된다
+    progress = pyqtSignal(str, int)
+    finished = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+    synced = pyqtSignal(object, object, int)
+    fetched = pyqtSignal(object, object)
+
+
+class SaveTask(QRunnable):
+    def __init__(self, data_manager, snapshot, upload, signals):
+        super().__init__()
+        self.data_manager = data_manager
+        self.snapshot = snapshot
+        self.upload = upload
+        self.signals = signals
+
+    def run(self):
+        try:
+            self.signals.finished.emit(self.save())
+        except Exception as e:
+            print(f"Background save failed: {e}")
+            self.signals.failed.emit(str(e))
+
+    def save(self):
+        snapshot = self.snapshot
+        self.signals.progress.emit("Encoding images...", 10)
+        html_contents = iter(render_snapshots(snapshot["documents"], blob_store=self.data_manager.blob_store))
+        # 스냅샷을 만들지 않은 탭(열어 보지 않았거나 바뀌지 않은 탭)은 저장돼 있던 본문을 그대로 쓴다
+        stored = self.data_manager.read_tabs([tab["id"] for tab in snapshot["tabs"] if not tab["snapshot"]])
+        tabs_data = []
+        for tab in snapshot["tabs"]:
+            if tab["snapshot"]:
+                content = next(html_contents)
+            elif stored.get(tab["id"]) is not None:
+                content = stored[tab["id"]]
+            else:
+                raise ValueError(f"Tab {tab['title']} is not in the local store")
+            tabs_data.append({"id": tab["id"], "title": tab["title"], "content": content})
+
+        data_to_save = {
+            "serial": self.data_manager.serial,
+            "active_tab_index": snapshot["active_tab_index"],
+            "tabs": tabs_data,
+            "version": self.data_manager.get_local_version() + 1
+        }
+
+        self.signals.progress.emit("Saving locally...", 50)
+        saved = self.data_manager.save_to_local(data_to_save, force_history=snapshot["force_history"])
+        uploaded = None
+        if self.upload:
+            self.signals.progress.emit("Uploading to server...", 75)
+            uploaded = self.data_manager.save_to_server(data_to_save) is not None
+        self.signals.progress.emit("Saved", 100)
+        # 저장소에 들어간 형태(이미지는 blob 참조)의 해시. 화면의 탭이 저장된 내용과 같은지 비교할 때 쓴다.
+        hashes = {tab["id"]: content_hash(tab["content"]) for tab in saved["tabs"]}
+        return {"version": data_to_save["version"], "tab_count": len(tabs_data),
+                "written_tabs": len(snapshot["documents"]), "uploaded": uploaded, "hashes": hashes}
+
+
+class UploadTask(SaveTask):
+    # 로컬에는 이미 저장된 내용을 서버에만 올린다
+    def __init__(self, data_manager, signals):
+        super().__init__(data_manager, None, True, signals)
+
+    def save(self):
+        self.signals.progress.emit("Uploading to server...", 50)
+        data = self.data_manager.load_from_local()
+        if data is None:
+            raise ValueError("Nothing saved locally to upload")
+        uploaded = self.data_manager.save_to_server(data) is not None
+        self.signals.progress.emit("Uploaded" if uploaded else "Upload failed", 100)
+        return {"version": data.get("version", 0), "tab_count": len(data.get("tabs", [])),
+                "written_tabs": 0, "uploaded": uploaded}
+
+
+def fetch_server_state(data_manager, signals):
+    # 서버 응답을 기다리는 동안 저장 스레드를 붙잡지 않도록 따로 띄운 스레드에서 부른다
+    try:
+        server_state = data_manager.fetch_server_state()
+    except Exception as e:
+        print(f"Failed to sync with server: {e}")
+        server_state = None
+    signals.fetched.emit(data_manager, server_state)
+
+
+class SyncTask(QRunnable):
+    # 받아 온 서버 상태를 그때의 로컬 데이터와 맞춘 결과를 로컬 저장소와 같은 형태(이미지는 blob 참조)로 돌려준다.
+    # 실패하면 None을 보낸다.
+    def __init__(self, data_manager, server_state, generation, signals):
+        super().__init__()
+        self.data_manager = data_manager
+        self.server_state = server_state
+        self.generation = generation
+        self.signals = signals
+
+    def run(self):
+        try:
+            local_data = self.data_manager.load_from_local_stream() or {"version": 0}
+            data = self.data_manager.apply_server_state(local_data, self.server_state)
+            blob_store = self.data_manager.blob_store
+            # 서버에서 받은 본문은 이미 로컬에 저장됐으므로 같은 blob 이름으로 바뀐다
+            tabs = [dict(tab, content=blob_store.externalize_html(tab["content"])) if "content" in tab else dict(tab)
+                    for tab in data.get("tabs", [])]
+            data = dict(data, tabs=tabs)
+        except Exception as e:
+            print(f"Failed to sync with server: {e}")
+            data = None
+        self.signals.synced.emit(self.data_manager, data, self.generation)
+
+
+class SavePipeline(QObject):
+    # 문서 스냅샷은 GUI 스레드에서 만들고 이미지 인코딩, 디스크 쓰기, 업로드는 작업 스레드에서 한다.
+    # 스레드가 하나뿐이라 저장은 요청한 순서대로 하나씩 실행된다.
+    progress = pyqtSignal(str, int)
+    finished = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+    synced = pyqtSignal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = SaveSignals()
+        self.signals.progress.connect(self.progress)
+        self.signals.finished.connect(self.on_finished)
+        self.signals.failed.connect(self.on_failed)
+        self.signals.synced.connect(self.on_synced)
+        self.signals.fetched.connect(self.on_fetched)
+        self.pending = 0
+        # 저장을 요청할 때마다 늘어난다. 동기화 결과가 어느 저장까지 반영한 것인지 가리는 데 쓴다.
+        self.generation = 0
+        # 서버 상태를 받는 중인지와 그동안 다시 동기화를 요청한 데이터 매니저
+        self.fetching = False
+        self.fetch_again = None
+
+    def save(self, data_manager, editors, titles, active_tab_index, upload=True, tab_ids=None, force_history=True):
+        # tab_ids를 주면 그 탭들만 스냅샷을 만들고 나머지는 저장소의 본문을 쓴다.
+        # force_history가 False이면 버전 기록은 기록 간격이 지났을 때만 남긴다.
+        selected = [getattr(editor, "content_loaded", True) and (tab_ids is None or editor.tab_id in tab_ids)
+                    for editor in editors]
+        snapshot = {
+            "documents": snapshot_editors([editor for editor, chosen in zip(editors, selected) if chosen]),
+            "tabs": [{"id": editor.tab_id, "title": title, "snapshot": chosen}
+                     for editor, title, chosen in zip(editors, titles, selected)],
+            "active_tab_index": active_tab_index,
+            "force_history": force_history,
+        }
+        self.pending += 1
+        self.generation += 1
+        self.progress.emit("Saving...", 0)
+        self.pool.start(SaveTask(data_manager, snapshot, upload, self.signals))
+
+    def upload(self, data_manager):
+        self.pending += 1
+        self.pool.start(UploadTask(data_manager, self.signals))
+
+    def sync(self, data_manager):
+        # 서버 상태는 따로 띄운 스레드에서 받고, 로컬과 맞추는 일은 받은 뒤에 저장과 같은 스레드에 넣는다.
+        # 그래서 wait()는 서버 응답을 기다리지 않고, 맞출 때는 앞서 요청한 저장이 끝난 로컬 데이터를 쓴다.
+        if self.fetching:
+            self.fetch_again = data_manager
+            return
+        self.fetching = True
+        threading.Thread(target=fetch_server_state, args=(data_manager, self.signals), daemon=True).start()
+
+    def on_fetched(self, data_manager, server_state):
+        self.fetching = False
+        if self.fetch_again is not None:
+            # 받는 동안 다시 요청됐으면 그 뒤의 서버 상태로 맞춘다
+            data_manager, self.fetch_again = self.fetch_again, None
+            self.sync(data_manager)
+            return
+        self.pool.start(SyncTask(data_manager, server_state, self.generation, self.signals))
+
+    def cancel_pending(self):
+        # 아직 시작하지 않은 작업을 버린다. 실행 중인 작업은 끝까지 돈다.
+        self.pool.clear()
+        self.pending = min(self.pending, self.pool.activeThreadCount())
+
+    def is_busy(self):
+        return self.pending > 0
+
+    def wait(self, timeout=-1):
+        return self.pool.waitForDone(timeout)
+
+    def on_finished(self, result):
+        self.pending -= 1
+        self.finished.emit(result)
+
+    def on_synced(self, data_manager, data, generation):
+        # 동기화를 요청한 뒤에 저장이 있었으면 결과는 그 저장보다 오래된 화면 상태를 기준으로 한 것이다.
+        # 그대로 반영하면 그 사이 만들거나 닫은 탭이 되돌려지므로 버리고 그 저장 뒤에 다시 동기화한다.
+        if generation != self.generation:
+            print("Sync result is older than the latest save, syncing again.")
+            self.sync(data_manager)
+            return
+        self.synced.emit(data_manager, data)
+
+    def on_failed(self, message):
+        self.pending -= 1
+        self.failed.emit(message)
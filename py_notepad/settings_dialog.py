@@ -44,6 +44,62 @@ class SettingsDialog(QDialog):
         self.server_url_edit = QLineEdit(self.settings.get("server_url", "http://192.168.5.118:9338"))
         layout.addWidget(self.server_url_edit)
 
+        # Local storage format
+        self.storage_format_label = QLabel("Storage Format:")
+        layout.addWidget(self.storage_format_label)
+        self.storage_format_combobox = QComboBox()
+        self.storage_format_combobox.addItems(["json", "tab_dir", "sqlite", "journal", "compressed", "container"])
+        self.storage_format_combobox.setCurrentText(self.settings.get("storage_format", "json"))
+        layout.addWidget(self.storage_format_combobox)
+
+        # Server sync mode
+        self.sync_mode_label = QLabel("Sync Mode:")
+        layout.addWidget(self.sync_mode_label)
+        self.sync_mode_combobox = QComboBox()
+        self.sync_mode_combobox.addItems(["full", "delta"])
+        self.sync_mode_combobox.setCurrentText(self.settings.get("sync_mode", "full"))
+        layout.addWidget(self.sync_mode_combobox)
+
+        # HTTP connection pool
+        self.http_pool_size_label = QLabel("HTTP Connection Pool Size:")
+        layout.addWidget(self.http_pool_size_label)
+        self.http_pool_size_edit = QLineEdit(str(self.settings.get("http_pool_size", 4)))
+        layout.addWidget(self.http_pool_size_edit)
+
+        self.http_retries_label = QLabel("HTTP Retries:")
+        layout.addWidget(self.http_retries_label)
+        self.http_retries_edit = QLineEdit(str(self.settings.get("http_retries", 2)))
+        layout.addWidget(self.http_retries_edit)
+
+        # Image storage policy
+        self.image_format_label = QLabel("Image Format:")
+        layout.addWidget(self.image_format_label)
+        self.image_format_combobox = QComboBox()
+        self.image_format_combobox.addItems(["PNG", "JPEG", "WEBP"])
+        self.image_format_combobox.setCurrentText(self.settings.get("image_format", "PNG"))
+        layout.addWidget(self.image_format_combobox)
+
+        self.image_quality_label = QLabel("Image Quality (0-100, -1 = default):")
+        layout.addWidget(self.image_quality_label)
+        self.image_quality_edit = QLineEdit(str(self.settings.get("image_quality", -1)))
+        layout.addWidget(self.image_quality_edit)
+
+        self.image_max_dimension_label = QLabel("Max Image Dimension (px, 0 = unlimited):")
+        layout.addWidget(self.image_max_dimension_label)
+        self.image_max_dimension_edit = QLineEdit(str(self.settings.get("image_max_dimension", 0)))
+        layout.addWidget(self.image_max_dimension_edit)
+
+        # Autosave
+        self.autosave_delay_label = QLabel("Autosave Delay (ms, 0 = off):")
+        layout.addWidget(self.autosave_delay_label)
+        self.autosave_delay_edit = QLineEdit(str(self.settings.get("autosave_delay_ms", 2000)))
+        layout.addWidget(self.autosave_delay_edit)
+
+        self.upload_interval_label = QLabel("Minimum Upload Interval (s):")
+        layout.addWidget(self.upload_interval_label)
+        self.upload_interval_edit = QLineEdit(str(self.settings.get("upload_interval_s", 60)))
+        layout.addWidget(self.upload_interval_edit)
+
         # Save Button
         self.apply_button = QPushButton("Apply")
         self.apply_button.clicked.connect(self.apply_settings)
@@ -60,4 +116,19 @@ class SettingsDialog(QDialog):
             self.settings["serials"].append(self.settings["serial"])
         self.settings["local_file"] = self.local_file_edit.text()
         self.settings["server_url"] = self.server_url_edit.text()
+        self.settings["storage_format"] = self.storage_format_combobox.currentText()
+        self.settings["sync_mode"] = self.sync_mode_combobox.currentText()
+        self.settings["http_pool_size"] = max(self.to_int(self.http_pool_size_edit.text(), 4), 1)
+        self.settings["http_retries"] = max(self.to_int(self.http_retries_edit.text(), 2), 0)
+        self.settings["image_format"] = self.image_format_combobox.currentText()
+        self.settings["image_quality"] = self.to_int(self.image_quality_edit.text(), -1)
+        self.settings["image_max_dimension"] = self.to_int(self.image_max_dimension_edit.text(), 0)
+        self.settings["autosave_delay_ms"] = self.to_int(self.autosave_delay_edit.text(), 2000)
+        self.settings["upload_interval_s"] = self.to_int(self.upload_interval_edit.text(), 60)
         self.accept()
+
+    def to_int(self, text, default):
+        try:
+            return int(text)
+        except ValueError:
+            return default
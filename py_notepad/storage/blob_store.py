@@ -0,0 +1,102 @@
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from collections import Counter
+
+DATA_URI_PATTERN = re.compile(r'src="data:([^;"]+);base64,([^"]*)"')
+BLOB_REF_PATTERN = re.compile(r'src="blob:([0-9a-f]{64}\.[A-Za-z0-9]+)"')
+
+
+class BlobStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_file = os.path.join(directory, "index.json")
+
+    def blob_path(self, blob_name):
+        return os.path.join(self.directory, blob_name)
+
+    def put(self, data, mime_type):
+        extension = (mimetypes.guess_extension(mime_type) or ".bin").lstrip(".")
+        blob_name = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        path = self.blob_path(blob_name)
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = path + ".tmp"
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        return blob_name
+
+    def exists(self, blob_name):
+        return os.path.exists(self.blob_path(blob_name))
+
+    def get(self, blob_name):
+        path = self.blob_path(blob_name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as file:
+            data = file.read()
+        mime_type, _ = mimetypes.guess_type(blob_name)
+        return data, mime_type or "application/octet-stream"
+
+    def externalize_html(self, html):
+        # 본문에 들어있는 data URI 이미지를 해시 이름의 blob 파일로 옮기고 참조로 바꾼다
+        if 'src="data:' not in html:
+            return html
+
+        def replace(match):
+            data = base64.b64decode(match.group(2))
+            return f'src="blob:{self.put(data, match.group(1))}"'
+
+        return DATA_URI_PATTERN.sub(replace, html)
+
+    def inline_html(self, html):
+        def replace(match):
+            blob = self.get(match.group(1))
+            if blob is None:
+                print(f"Missing image blob: {match.group(1)}")
+                return match.group(0)
+            data, mime_type = blob
+            return f'src="data:{mime_type};base64,{base64.b64encode(data).decode()}"'
+
+        return BLOB_REF_PATTERN.sub(replace, html)
+
+    def count_references(self, html_list):
+        references = Counter()
+        for html in html_list:
+            references.update(BLOB_REF_PATTERN.findall(html))
+        return references
+
+    def load_index(self):
+        if os.path.exists(self.index_file):
+            with open(self.index_file, "r", encoding='utf-8') as file:
+                return json.load(file)
+        return {}
+
+    def update_references(self, html_list):
+        # 참조 수를 다시 계산해서 기록하고, 더 이상 참조되지 않는 blob은 지운다
+        references = self.count_references(html_list)
+        if not references and not os.path.isdir(self.directory):
+            return references
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.index_file + ".tmp"
+        with open(temp_path, "w", encoding='utf-8') as file:
+            json.dump(dict(references), file)
+        os.replace(temp_path, self.index_file)
+        self.collect_garbage(references)
+        return references
+
+    def collect_garbage(self, references):
+        removed = 0
+        for blob_name in os.listdir(self.directory):
+            if blob_name == "index.json" or blob_name.endswith(".tmp"):
+                continue
+            if references.get(blob_name, 0) == 0:
+                os.remove(self.blob_path(blob_name))
+                removed += 1
+        if removed:
+            print(f"Removed {removed} unreferenced image blobs.")
+        return removed
@@ -0,0 +1,122 @@
+import json
+import os
+import struct
+import zlib
+
+try:
+    from py_notepad.storage.json_stream import JsonNotebookReader
+    from py_notepad.storage.tab_directory_store import content_hash
+except ImportError:
+    from storage.json_stream import JsonNotebookReader
+    from storage.tab_directory_store import content_hash
+
+MAGIC = b"HNZ1"
+RECORD_LENGTH = struct.Struct("<I")
+
+# QTextEdit.toHtml()이 모든 탭에 반복해서 넣는 문자열. zlib는 사전 끝쪽을 더 싸게 참조하므로
+# 가장 자주 나오는 조각을 뒤에 둔다. 내용을 바꾸면 MAGIC의 버전도 올려야 한다.
+QT_HTML_DICTIONARY = (
+    '{"id": "", "title": "New Tab", "content": "'
+    '<!DOCTYPE HTML PUBLIC \\"-//W3C//DTD HTML 4.0//EN\\" \\"http://www.w3.org/TR/REC-html40/strict.dtd\\">\\n'
+    '<html><head><meta name=\\"qrichtext\\" content=\\"1\\" /><meta charset=\\"utf-8\\" />'
+    '<style type=\\"text/css\\">\\np, li { white-space: pre-wrap; }\\nhr { height: 1px; border-width: 0; }\\n'
+    'li.unchecked::marker { content: \\"\\\\2610\\"; }\\nli.checked::marker { content: \\"\\\\2612\\"; }\\n'
+    '</style></head><body style=\\" font-family:\'맑은 고딕\'; font-size:12pt; font-weight:400; font-style:normal;\\">\\n'
+    '<p style=\\"-qt-paragraph-type:empty; margin-top:0px; margin-bottom:0px; margin-left:0px; margin-right:0px; '
+    '-qt-block-indent:0; text-indent:0px;\\"><br /></p>\\n'
+    '<span style=\\" font-weight:600;\\"></span><span style=\\" font-style:italic;\\"></span>'
+    '<span style=\\" text-decoration: underline;\\"></span><span style=\\" color:#808080;\\"></span>'
+    '<img src=\\"blob:.png\\" /><img src=\\"data:image/png;base64,iVBORw0KGgo'
+    'Created on: <br />Author: Your Name</p>'
+    '</p></body></html>"}'
+    '<p style=\\" margin-top:0px; margin-bottom:0px; margin-left:0px; margin-right:0px; '
+    '-qt-block-indent:0; text-indent:0px;\\">'
+).encode('utf-8')
+
+
+def is_compressed_notebook(path):
+    try:
+        with open(path, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def compress_record(value):
+    compressor = zlib.compressobj(6, zdict=QT_HTML_DICTIONARY)
+    return compressor.compress(json.dumps(value, ensure_ascii=False).encode('utf-8')) + compressor.flush()
+
+
+def decompress_record(data):
+    decompressor = zlib.decompressobj(zdict=QT_HTML_DICTIONARY)
+    return json.loads(decompressor.decompress(data) + decompressor.flush())
+
+
+def read_compressed_notebook(path, header):
+    # 헤더 레코드 뒤에 탭 레코드가 길이와 함께 차례로 이어진다. 탭을 하나씩 풀어서 돌려준다.
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a compressed notebook")
+        header.update(decompress_record(_read_record(file)))
+        while True:
+            record = _read_record(file)
+            if not record:
+                return
+            yield decompress_record(record)
+
+
+def _read_record(file):
+    prefix = file.read(RECORD_LENGTH.size)
+    if len(prefix) < RECORD_LENGTH.size:
+        raise ValueError("Unexpected end of compressed notebook")
+    (length,) = RECORD_LENGTH.unpack(prefix)
+    return file.read(length)
+
+
+class CompressedTabStore:
+    # tabs_data.json과 같은 파일에 MAGIC, 헤더 레코드, 탭마다 따로 압축한 레코드, 길이 0 레코드 순으로 쓴다.
+    # 읽을 때는 앞 4바이트로 형식을 구분하므로 json 형식과 서로 바꿔도 기존 파일을 읽을 수 있다.
+    def __init__(self, path):
+        self.path = path
+        # 바뀌지 않은 탭은 다시 압축하지 않도록 tab id별로 (해시, 압축 결과)를 기억한다
+        self._compressed = {}
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def content_files(self):
+        return [self.path]
+
+    def save(self, data):
+        header = {key: value for key, value in data.items() if key != "tabs"}
+        compressed = {}
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(MAGIC)
+            self._write_record(file, compress_record(header))
+            for tab in data.get("tabs", []):
+                tab_hash = content_hash(tab.get("title", "") + "\0" + tab.get("content", ""))
+                cached = self._compressed.get(tab.get("id"))
+                record = cached[1] if cached and cached[0] == tab_hash else compress_record(tab)
+                compressed[tab.get("id")] = (tab_hash, record)
+                self._write_record(file, record)
+            self._write_record(file, b"")
+        os.replace(temp_path, self.path)
+        self._compressed = compressed
+
+    def load_stream(self, header):
+        if is_compressed_notebook(self.path):
+            return read_compressed_notebook(self.path, header)
+        # 압축하지 않은 JSON으로 저장돼 있으면 그대로 읽는다
+        return JsonNotebookReader(self.path).read(header)
+
+    def load(self):
+        if not self.exists():
+            return None
+        data = {}
+        data["tabs"] = list(self.load_stream(data))
+        return data
+
+    def _write_record(self, file, record):
+        file.write(RECORD_LENGTH.pack(len(record)))
+        file.write(record)
@@ -0,0 +1,339 @@
+import hashlib
+import mimetypes
+import mmap
+import os
+import struct
+import threading
+
+try:
+    from py_notepad.storage.blob_store import BlobStore, BLOB_REF_PATTERN
+    from py_notepad.storage.tab_directory_store import new_tab_id, content_hash
+except ImportError:
+    from storage.blob_store import BlobStore, BLOB_REF_PATTERN
+    from storage.tab_directory_store import new_tab_id, content_hash
+
+MAGIC = b"NBC1"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+# magic, 형식 버전, flags, 노트 버전, 활성 탭, 탭 수, 오프셋 표 위치와 길이, 더 이상 쓰지 않는 바이트 수
+HEADER = struct.Struct("<4sHHqiIQQQ")
+PAYLOAD_LENGTH = struct.Struct("<I")
+TAB_ENTRY = struct.Struct("<QI20s")
+IMAGE_ENTRY = struct.Struct("<QI")
+COUNT = struct.Struct("<I")
+SHORT_STRING = struct.Struct("<H")
+LONG_STRING = struct.Struct("<I")
+# 버려진 영역이 이보다 크고 살아있는 데이터보다 많아지면 파일을 새로 쓴다
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+class ContainerTabStore:
+    # 고정 크기 헤더, 길이가 앞에 붙은 탭 본문과 이미지, 그리고 이들을 가리키는 오프셋 표로 된 파일 하나.
+    # 헤더만 읽으면 오프셋 표를 찾을 수 있고, 표만 읽으면 탭 하나를 seek 한 번으로 꺼낼 수 있다.
+    # 저장할 때는 바뀐 탭과 새 오프셋 표만 파일 끝에 덧붙이고 마지막에 헤더를 고쳐 쓴다.
+    # 헤더를 쓰기 전까지는 예전 오프셋 표가 그대로 유효하므로 중간에 끊겨도 이전 저장 상태로 남는다.
+    def __init__(self, path, serial):
+        self.path = path
+        self.serial = serial
+        self.lock = threading.Lock()
+        self.header = None
+        self.tabs = None
+        self.images = None
+        self.pending_images = {}
+        self.blob_store = ContainerBlobStore(self)
+        self.last_written = 0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def content_files(self):
+        return [self.path]
+
+    def save(self, data):
+        tabs = data.get("tabs", [])
+        with self.lock:
+            if not os.path.exists(self.path):
+                self._write_compacted(data)
+                self.last_written = len(tabs)
+                print(f"Wrote {len(tabs)} of {len(tabs)} tabs to {self.path}.")
+                return
+            self._read_index()
+            self.last_written = 0
+            with open(self.path, "r+b") as file:
+                file.seek(0, os.SEEK_END)
+                dead_bytes = self.header["dead_bytes"] + self.header["index_length"]
+                new_tabs = {}
+                for tab in tabs:
+                    tab_id = tab.get("id") or new_tab_id()
+                    content = tab.get("content", "")
+                    digest = bytes.fromhex(content_hash(content))
+                    entry = self.tabs.get(tab_id)
+                    if entry is not None and entry["digest"] == digest:
+                        new_tabs[tab_id] = dict(entry, title=tab.get("title", "New Tab"))
+                        continue
+                    if entry is not None:
+                        dead_bytes += PAYLOAD_LENGTH.size + entry["length"]
+                    offset, length = self._append_payload(file, content.encode('utf-8'))
+                    new_tabs[tab_id] = {"title": tab.get("title", "New Tab"), "offset": offset,
+                                        "length": length, "digest": digest}
+                    self.last_written += 1
+                for tab_id, entry in self.tabs.items():
+                    if tab_id not in new_tabs:
+                        dead_bytes += PAYLOAD_LENGTH.size + entry["length"]
+
+                new_images, dead_bytes = self._save_images(file, tabs, dead_bytes)
+                index = self._encode_index(new_tabs, new_images)
+                index_offset = file.tell()
+                file.write(index)
+                file.flush()
+                os.fsync(file.fileno())
+
+                header = {"version": data.get("version", 0), "active_tab_index": data.get("active_tab_index", 0),
+                          "tab_count": len(new_tabs), "index_offset": index_offset, "index_length": len(index),
+                          "dead_bytes": dead_bytes}
+                file.seek(0)
+                file.write(self._encode_header(header))
+                file.flush()
+                os.fsync(file.fileno())
+                live_bytes = file.seek(0, os.SEEK_END) - dead_bytes
+            self.header, self.tabs, self.images = header, new_tabs, new_images
+            self.pending_images = {}
+            if dead_bytes > COMPACT_MIN_BYTES and dead_bytes > live_bytes:
+                self._write_compacted(self._current_data())
+        print(f"Wrote {self.last_written} of {len(tabs)} tabs to {self.path}.")
+
+    def load(self):
+        data = {}
+        tabs = self.load_stream(data)
+        if tabs is None:
+            return None
+        data["tabs"] = list(tabs)
+        return data
+
+    def load_stream(self, header):
+        with self.lock:
+            if not self._read_index():
+                return None
+            header.update({"serial": self.serial, "version": self.header["version"],
+                           "active_tab_index": self.header["active_tab_index"]})
+            entries = list(self.tabs.items())
+        return self._read_tabs(entries)
+
+    def read_tab(self, tab_id):
+        # 오프셋 표에서 위치를 찾아 해당 탭 본문만 읽는다
+        with self.lock:
+            if not self._read_index():
+                return None
+            entry = self.tabs.get(tab_id)
+        if entry is None:
+            return None
+        with open(self.path, "rb") as file:
+            file.seek(entry["offset"] + PAYLOAD_LENGTH.size)
+            return file.read(entry["length"]).decode('utf-8')
+
+    def load_version(self):
+        with self.lock:
+            header = self._read_header()
+        return header["version"] if header is not None else None
+
+    def load_metadata(self):
+        with self.lock:
+            if not self._read_index():
+                return None
+            return {
+                "serial": self.serial,
+                "version": self.header["version"],
+                "active_tab_index": self.header["active_tab_index"],
+                "tabs": [{"id": tab_id, "title": entry["title"], "size": entry["length"]}
+                         for tab_id, entry in self.tabs.items()],
+            }
+
+    def _read_tabs(self, entries):
+        with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for tab_id, entry in entries:
+                start = entry["offset"] + PAYLOAD_LENGTH.size
+                yield {"id": tab_id, "title": entry["title"],
+                       "content": view[start:start + entry["length"]].decode('utf-8')}
+
+    def _current_data(self):
+        # 압축할 때 쓸 현재 내용. 이미지는 다시 쓸 수 있도록 pending_images로 옮겨 둔다.
+        data = {"serial": self.serial, "version": self.header["version"],
+                "active_tab_index": self.header["active_tab_index"]}
+        data["tabs"] = list(self._read_tabs(list(self.tabs.items())))
+        with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for name, entry in self.images.items():
+                if name not in self.pending_images:
+                    start = entry["offset"] + PAYLOAD_LENGTH.size
+                    self.pending_images[name] = (view[start:start + entry["length"]], entry["mime_type"])
+        return data
+
+    def _read_header(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as file:
+            raw = file.read(HEADER.size)
+        magic, format_version, _, version, active_tab_index, tab_count, index_offset, index_length, dead_bytes = \
+            HEADER.unpack(raw)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a notebook container")
+        return {"version": version, "active_tab_index": active_tab_index, "tab_count": tab_count,
+                "index_offset": index_offset, "index_length": index_length, "dead_bytes": dead_bytes}
+
+    def _read_index(self):
+        # 헤더가 가리키는 오프셋 표가 그대로면 메모리에 있는 표를 쓴다
+        header = self._read_header()
+        if header is None:
+            self.header, self.tabs, self.images = None, None, None
+            return False
+        if header == self.header and self.tabs is not None:
+            return True
+        with open(self.path, "rb") as file:
+            file.seek(header["index_offset"])
+            index = file.read(header["index_length"])
+        self.header = header
+        self.tabs, self.images = self._decode_index(index)
+        return True
+
+    def _append_payload(self, file, payload):
+        offset = file.tell()
+        file.write(PAYLOAD_LENGTH.pack(len(payload)))
+        file.write(payload)
+        return offset, len(payload)
+
+    def _save_images(self, file, tabs, dead_bytes):
+        # 이번 저장의 탭들이 참조하는 이미지만 표에 남긴다. 새 이미지는 여기서 처음 파일에 쓴다.
+        referenced = set()
+        for tab in tabs:
+            referenced.update(BLOB_REF_PATTERN.findall(tab.get("content", "")))
+        new_images = {}
+        for name in referenced:
+            if name in self.images:
+                new_images[name] = self.images[name]
+            elif name in self.pending_images:
+                data, mime_type = self.pending_images[name]
+                offset, length = self._append_payload(file, data)
+                new_images[name] = {"offset": offset, "length": length, "mime_type": mime_type}
+        for name, entry in self.images.items():
+            if name not in new_images:
+                dead_bytes += PAYLOAD_LENGTH.size + entry["length"]
+        return new_images, dead_bytes
+
+    def _write_compacted(self, data):
+        # 탭 영역, 이미지 영역, 오프셋 표 순서로 파일 전체를 새로 쓰고 교체한다
+        tabs = data.get("tabs", [])
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(bytes(HEADER_SIZE))
+            new_tabs = {}
+            for tab in tabs:
+                content = tab.get("content", "")
+                offset, length = self._append_payload(file, content.encode('utf-8'))
+                new_tabs[tab.get("id") or new_tab_id()] = {
+                    "title": tab.get("title", "New Tab"), "offset": offset, "length": length,
+                    "digest": bytes.fromhex(content_hash(content))}
+            self.images = {}
+            new_images, _ = self._save_images(file, tabs, 0)
+            index = self._encode_index(new_tabs, new_images)
+            index_offset = file.tell()
+            file.write(index)
+            header = {"version": data.get("version", 0), "active_tab_index": data.get("active_tab_index", 0),
+                      "tab_count": len(new_tabs), "index_offset": index_offset, "index_length": len(index),
+                      "dead_bytes": 0}
+            file.seek(0)
+            file.write(self._encode_header(header))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+        self.header, self.tabs, self.images = header, new_tabs, new_images
+        self.pending_images = {}
+
+    def _encode_header(self, header):
+        raw = HEADER.pack(MAGIC, FORMAT_VERSION, 0, header["version"], header["active_tab_index"],
+                          header["tab_count"], header["index_offset"], header["index_length"], header["dead_bytes"])
+        return raw + bytes(HEADER_SIZE - len(raw))
+
+    def _encode_index(self, tabs, images):
+        parts = [self._encode_string(self.serial, SHORT_STRING), COUNT.pack(len(tabs))]
+        for tab_id, entry in tabs.items():
+            parts.append(TAB_ENTRY.pack(entry["offset"], entry["length"], entry["digest"]))
+            parts.append(self._encode_string(tab_id, SHORT_STRING))
+            parts.append(self._encode_string(entry["title"], LONG_STRING))
+        parts.append(COUNT.pack(len(images)))
+        for name, entry in images.items():
+            parts.append(IMAGE_ENTRY.pack(entry["offset"], entry["length"]))
+            parts.append(self._encode_string(name, SHORT_STRING))
+            parts.append(self._encode_string(entry["mime_type"], SHORT_STRING))
+        return b"".join(parts)
+
+    def _decode_index(self, index):
+        position = 0
+
+        def unpack(layout):
+            nonlocal position
+            values = layout.unpack_from(index, position)
+            position += layout.size
+            return values
+
+        def string(layout):
+            nonlocal position
+            (length,) = unpack(layout)
+            position += length
+            return index[position - length:position].decode('utf-8')
+
+        string(SHORT_STRING)
+        tabs = {}
+        (tab_count,) = unpack(COUNT)
+        for _ in range(tab_count):
+            offset, length, digest = unpack(TAB_ENTRY)
+            tab_id = string(SHORT_STRING)
+            tabs[tab_id] = {"title": string(LONG_STRING), "offset": offset, "length": length, "digest": digest}
+        images = {}
+        (image_count,) = unpack(COUNT)
+        for _ in range(image_count):
+            offset, length = unpack(IMAGE_ENTRY)
+            name = string(SHORT_STRING)
+            images[name] = {"offset": offset, "length": length, "mime_type": string(SHORT_STRING)}
+        return tabs, images
+
+    def _encode_string(self, value, layout):
+        raw = value.encode('utf-8')
+        return layout.pack(len(raw)) + raw
+
+
+class ContainerBlobStore(BlobStore):
+    # 이미지 blob을 컨테이너 파일의 이미지 영역에 보관한다.
+    # 새 이미지는 다음 save에서 탭과 함께 파일에 쓰일 때까지 메모리에 둔다.
+    def __init__(self, store):
+        self.directory = None
+        self.store = store
+
+    def put(self, data, mime_type):
+        extension = (mimetypes.guess_extension(mime_type) or ".bin").lstrip(".")
+        blob_name = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        with self.store.lock:
+            if blob_name not in (self.store.images or {}):
+                self.store.pending_images[blob_name] = (data, mime_type)
+        return blob_name
+
+    def exists(self, blob_name):
+        with self.store.lock:
+            if blob_name in self.store.pending_images:
+                return True
+            return bool(self.store._read_index()) and blob_name in self.store.images
+
+    def get(self, blob_name):
+        with self.store.lock:
+            if blob_name in self.store.pending_images:
+                return self.store.pending_images[blob_name]
+            if not self.store._read_index():
+                return None
+            entry = self.store.images.get(blob_name)
+        if entry is None:
+            return None
+        with open(self.store.path, "rb") as file:
+            file.seek(entry["offset"] + PAYLOAD_LENGTH.size)
+            return file.read(entry["length"]), entry["mime_type"]
+
+    def update_references(self, html_list):
+        # 참조되지 않는 이미지는 save에서 오프셋 표를 새로 쓸 때 이미 빠진다
+        return 0
@@ -0,0 +1,224 @@
+import difflib
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+try:
+    from py_notepad.storage.blob_store import BlobStore, BLOB_REF_PATTERN
+    from py_notepad.storage.compressed_store import compress_record, decompress_record
+    from py_notepad.storage.tab_directory_store import content_hash
+except ImportError:
+    from storage.blob_store import BlobStore, BLOB_REF_PATTERN
+    from storage.compressed_store import compress_record, decompress_record
+    from storage.tab_directory_store import content_hash
+
+
+def make_delta(base, content):
+    # base의 줄 범위를 복사하는 [시작, 끝]과 새로 넣는 문자열로 content를 표현한다
+    if base == content:
+        return [[0, len(base.splitlines(keepends=True))]] if base else []
+    base_lines = base.splitlines(keepends=True)
+    lines = content.splitlines(keepends=True)
+    delta = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append([i1, i2])
+        elif j1 < j2:
+            delta.append("".join(lines[j1:j2]))
+    return delta
+
+
+def apply_delta(base, delta):
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+class VersionHistory:
+    # 저장할 때마다 노트 전체를 복사하지 않고, 탭마다 이전 버전에 대한 줄 단위 delta로 기록한다.
+    # snapshot_interval개마다 전체 스냅샷을 하나 두고, 그 안의 p번째 기록은 p에서 가장 낮은 1비트를 지운
+    # 기록을 기준으로 삼는다(skip-delta). 그래서 어떤 버전이든 최대 log2(snapshot_interval)번의 delta만
+    # 적용하면 복원된다. 최근 max_versions개를 넘는 오래된 구간은 구간 단위로 지운다.
+    # 자동 저장처럼 force 없이 기록하면 마지막 기록에서 min_interval초가 지났을 때만 남긴다.
+    def __init__(self, directory, max_versions=50, snapshot_interval=32, cache_size=4, min_interval=300):
+        self.directory = directory
+        self.index_file = os.path.join(directory, "index.json")
+        self.max_versions = max_versions
+        self.snapshot_interval = snapshot_interval
+        # 기록에 쓰인 이미지는 본 저장소에서 지워져도 복원할 수 있도록 따로 보관한다
+        self.blob_store = BlobStore(os.path.join(directory, "blobs"))
+        self.lock = threading.Lock()
+        self.index = None
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.min_interval = min_interval
+        # 마지막 기록의 탭별 (id, 제목, 본문 해시)와 기준 기록에 대한 delta.
+        # 바뀌지 않은 노트는 다시 기록하지 않고, 같은 기준에 같은 본문이면 delta를 다시 계산하지 않는다.
+        self.last_tabs = None
+        self.deltas = {}
+
+    def record_file(self, sequence):
+        return os.path.join(self.directory, f"{sequence}.rec")
+
+    def versions(self):
+        with self.lock:
+            index = self._load_index()
+            return [{key: entry[key] for key in ("version", "saved_at", "tab_count")}
+                    for entry in reversed(index["entries"])]
+
+    def record(self, data, blob_store=None, force=True):
+        with self.lock:
+            index = self._load_index()
+            hashes = [content_hash(tab.get("content", "")) for tab in data.get("tabs", [])]
+            tab_keys = [(tab.get("id"), tab.get("title", "New Tab"), tab_hash)
+                        for tab, tab_hash in zip(data.get("tabs", []), hashes)]
+            if tab_keys == self.last_tabs and index["entries"]:
+                return False
+            if not force and index["entries"] and time.time() - index["entries"][-1]["saved_at"] < self.min_interval:
+                return False
+            sequence = index["next"]
+            if not index["entries"] or sequence - index["epoch"] >= self.snapshot_interval:
+                index["epoch"] = sequence
+            position = sequence - index["epoch"]
+            base = index["epoch"] + (position & (position - 1)) if position else None
+            base_tabs = self._tabs_at(base) if base is not None else {}
+
+            tabs = OrderedDict()
+            records = []
+            blobs = set()
+            deltas = {}
+            for tab, tab_hash in zip(data.get("tabs", []), hashes):
+                content = tab.get("content", "")
+                tabs[tab.get("id")] = tab
+                blobs.update(BLOB_REF_PATTERN.findall(content))
+                record = {"id": tab.get("id"), "title": tab.get("title", "New Tab")}
+                if tab.get("id") in base_tabs:
+                    cached = self.deltas.get(tab.get("id"))
+                    if cached is not None and cached[:2] == (base, tab_hash):
+                        record["delta"] = cached[2]
+                    else:
+                        record["delta"] = make_delta(base_tabs[tab.get("id")]["content"], content)
+                    deltas[tab.get("id")] = (base, tab_hash, record["delta"])
+                else:
+                    record["content"] = content
+                records.append(record)
+
+            os.makedirs(self.directory, exist_ok=True)
+            self._copy_blobs(blobs, blob_store)
+            header = {key: data.get(key) for key in ("serial", "version", "active_tab_index")}
+            with open(self.record_file(sequence), "wb") as file:
+                file.write(compress_record(dict(header, base=base, tabs=records)))
+            index["entries"].append({"sequence": sequence, "epoch": index["epoch"], "version": data.get("version", 0),
+                                     "saved_at": time.time(), "tab_count": len(records), "blobs": sorted(blobs)})
+            index["next"] = sequence + 1
+            self._remember(sequence, {tab_id: {"id": tab_id, "title": tab.get("title", "New Tab"),
+                                               "content": tab.get("content", "")} for tab_id, tab in tabs.items()})
+            self._prune(index)
+            self._write_index(index)
+            self.last_tabs = tab_keys
+            self.deltas = deltas
+            return True
+
+    def load(self, version):
+        # 같은 버전이 여러 번 기록됐으면 마지막 기록을 쓴다
+        with self.lock:
+            entry = self._find(version)
+            if entry is None:
+                return None
+            with open(self.record_file(entry["sequence"]), "rb") as file:
+                header = decompress_record(file.read())
+            data = {key: header.get(key) for key in ("serial", "version", "active_tab_index")}
+            data["tabs"] = [dict(tab) for tab in self._tabs_at(entry["sequence"]).values()]
+        return data
+
+    def load_tab(self, version, tab_id):
+        data = self.load(version)
+        if data is None:
+            return None
+        for tab in data["tabs"]:
+            if tab["id"] == tab_id:
+                return tab
+        return None
+
+    def _find(self, version):
+        index = self._load_index()
+        for entry in reversed(index["entries"]):
+            if entry["version"] == version:
+                return entry
+        return None
+
+    def _tabs_at(self, sequence):
+        # 스냅샷까지 기준 기록을 따라 올라간 뒤 delta를 차례로 적용한다
+        chain = []
+        while sequence is not None and sequence not in self.cache:
+            with open(self.record_file(sequence), "rb") as file:
+                record = decompress_record(file.read())
+            chain.append((sequence, record))
+            sequence = record["base"]
+        tabs = self.cache[sequence] if sequence is not None else {}
+        for sequence, record in reversed(chain):
+            base_tabs = tabs
+            tabs = OrderedDict()
+            for tab in record["tabs"]:
+                content = tab["content"] if "content" in tab else apply_delta(base_tabs[tab["id"]]["content"],
+                                                                              tab["delta"])
+                tabs[tab["id"]] = {"id": tab["id"], "title": tab["title"], "content": content}
+            self._remember(sequence, tabs)
+        return tabs
+
+    def _remember(self, sequence, tabs):
+        self.cache[sequence] = tabs
+        self.cache.move_to_end(sequence)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _copy_blobs(self, blobs, blob_store):
+        if blob_store is None:
+            return
+        for blob_name in blobs:
+            if os.path.exists(self.blob_store.blob_path(blob_name)):
+                continue
+            blob = blob_store.get(blob_name)
+            if blob is not None:
+                self.blob_store.put(*blob)
+
+    def _prune(self, index):
+        # 최근 max_versions개에 들지 않는 기록만 남은 구간은 통째로 지운다
+        entries = index["entries"]
+        keep_from = entries[max(len(entries) - self.max_versions, 0)]["epoch"]
+        removed = [entry for entry in entries if entry["epoch"] < keep_from]
+        if not removed:
+            return
+        index["entries"] = [entry for entry in entries if entry["epoch"] >= keep_from]
+        for entry in removed:
+            self.cache.pop(entry["sequence"], None)
+            try:
+                os.remove(self.record_file(entry["sequence"]))
+            except FileNotFoundError:
+                pass
+        if os.path.isdir(self.blob_store.directory):
+            references = Counter(blob_name for entry in index["entries"] for blob_name in entry["blobs"])
+            self.blob_store.collect_garbage(references)
+
+    def _load_index(self):
+        if self.index is None:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, "r", encoding='utf-8') as file:
+                    self.index = json.load(file)
+            else:
+                self.index = {"next": 0, "epoch": 0, "entries": []}
+        return self.index
+
+    def _write_index(self, index):
+        temp_path = self.index_file + ".tmp"
+        with open(temp_path, "w", encoding='utf-8') as file:
+            json.dump(index, file, ensure_ascii=False)
+        os.replace(temp_path, self.index_file)
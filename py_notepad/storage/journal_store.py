@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+
+try:
+    from py_notepad.storage.tab_directory_store import new_tab_id
+except ImportError:
+    from storage.tab_directory_store import new_tab_id
+
+META_KEYS = ("serial", "version", "active_tab_index")
+
+
+class JournalTabStore:
+    # 스냅샷 파일 하나와 추가 전용 저널 파일로 저장한다. 저장할 때마다 바뀐 부분만
+    # 한 줄짜리 레코드로 저널 끝에 붙이고, 저널이 커지면 백그라운드에서 스냅샷으로 합친다.
+    def __init__(self, base_path, compact_threshold=8 * 1024 * 1024):
+        self.snapshot_file = base_path + ".snapshot.json"
+        self.journal_file = base_path + ".journal"
+        self.compact_threshold = compact_threshold
+        self.lock = threading.Lock()
+        self.compactor = None
+        self.meta = None
+        self.tabs = None
+        self.sequence = 0
+        self.last_written = 0
+
+    def exists(self):
+        return os.path.exists(self.snapshot_file) or os.path.exists(self.journal_file)
+
+    def content_files(self):
+        return [self.snapshot_file, self.journal_file]
+
+    def load(self):
+        with self.lock:
+            self._replay()
+            return self._current_data()
+
+    def save(self, data):
+        with self.lock:
+            if self.tabs is None:
+                self._replay()
+            records = self._diff(data)
+            if records:
+                self._append(records)
+            self.last_written = len(records)
+            journal_size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        print(f"Appended {len(records)} journal records.")
+        if journal_size > self.compact_threshold:
+            self.compact_in_background()
+
+    def compact_in_background(self):
+        if self.compactor is not None and self.compactor.is_alive():
+            return
+        self.compactor = threading.Thread(target=self.compact, daemon=True)
+        self.compactor.start()
+
+    def compact(self):
+        with self.lock:
+            snapshot = {"sequence": self.sequence, "data": self._current_data()}
+        # 스냅샷 쓰기는 lock 밖에서 한다. 그동안의 저장은 저널에 계속 붙는다.
+        temp_path = self.snapshot_file + ".tmp"
+        with open(temp_path, "w", encoding='utf-8') as file:
+            json.dump(snapshot, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_file)
+
+        with self.lock:
+            # 스냅샷에 이미 들어간 레코드를 저널에서 걷어낸다
+            remaining = [line for line in self._read_journal() if line[0] > snapshot["sequence"]]
+            temp_path = self.journal_file + ".tmp"
+            with open(temp_path, "w", encoding='utf-8') as file:
+                for _, line in remaining:
+                    file.write(line)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.journal_file)
+        print(f"Compacted journal into snapshot at sequence {snapshot['sequence']}.")
+
+    def _current_data(self):
+        if self.meta is None:
+            return None
+        data = dict(self.meta)
+        data["tabs"] = [dict(tab) for tab in self.tabs.values()]
+        return data
+
+    def _replay(self):
+        self.meta = None
+        self.tabs = {}
+        self.sequence = 0
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, "r", encoding='utf-8') as file:
+                snapshot = json.load(file)
+            self.sequence = snapshot["sequence"]
+            self._apply({"op": "meta", **{key: snapshot["data"].get(key) for key in META_KEYS}})
+            for tab in snapshot["data"].get("tabs", []):
+                self.tabs[tab["id"]] = tab
+        for sequence, line in self._read_journal():
+            if sequence > self.sequence:
+                self._apply(json.loads(line))
+                self.sequence = sequence
+
+    def _read_journal(self):
+        lines = []
+        if not os.path.exists(self.journal_file):
+            return lines
+        valid_size = 0
+        with open(self.journal_file, "rb") as file:
+            for raw_line in file:
+                try:
+                    if not raw_line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    line = raw_line.decode('utf-8')
+                    record = json.loads(line)
+                except ValueError:
+                    # 쓰다가 끊긴 마지막 레코드는 버린다
+                    break
+                lines.append((record["seq"], line))
+                valid_size += len(raw_line)
+        if valid_size < os.path.getsize(self.journal_file):
+            print("Discarding incomplete record at the end of the journal.")
+            with open(self.journal_file, "r+b") as file:
+                file.truncate(valid_size)
+        return lines
+
+    def _apply(self, record):
+        op = record["op"]
+        if op == "meta":
+            self.meta = {key: record.get(key) for key in META_KEYS}
+        elif op == "insert":
+            self.tabs[record["id"]] = {"id": record["id"], "title": record["title"], "content": record["content"]}
+        elif op == "update":
+            tab = self.tabs[record["id"]]
+            for key in ("title", "content"):
+                if key in record:
+                    tab[key] = record[key]
+        elif op == "delete":
+            self.tabs.pop(record["id"], None)
+        elif op == "move":
+            self.tabs = {tab_id: self.tabs[tab_id] for tab_id in record["ids"] if tab_id in self.tabs}
+
+    def _diff(self, data):
+        records = []
+        new_ids = []
+        for tab in data.get("tabs", []):
+            tab_id = tab.get("id") or new_tab_id()
+            new_ids.append(tab_id)
+            title = tab.get("title", "New Tab")
+            content = tab.get("content", "")
+            old_tab = self.tabs.get(tab_id)
+            if old_tab is None:
+                records.append({"op": "insert", "id": tab_id, "title": title, "content": content})
+                continue
+            record = {}
+            if old_tab["title"] != title:
+                record["title"] = title
+            if old_tab["content"] != content:
+                record["content"] = content
+            if record:
+                records.append({"op": "update", "id": tab_id, **record})
+
+        new_id_set = set(new_ids)
+        for tab_id in self.tabs:
+            if tab_id not in new_id_set:
+                records.append({"op": "delete", "id": tab_id})
+
+        # 추가와 삭제를 반영한 뒤의 순서가 다르면 탭이 옮겨진 것이다
+        order = [tab_id for tab_id in self.tabs if tab_id in new_id_set]
+        order += [tab_id for tab_id in new_ids if tab_id not in self.tabs]
+        if order != new_ids:
+            records.append({"op": "move", "ids": new_ids})
+
+        meta = {key: data.get(key) for key in META_KEYS}
+        if meta != self.meta:
+            records.append({"op": "meta", **meta})
+        return records
+
+    def _append(self, records):
+        with open(self.journal_file, "a", encoding='utf-8') as file:
+            for record in records:
+                self.sequence += 1
+                record["seq"] = self.sequence
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._apply(record)
+            file.flush()
+            os.fsync(file.fileno())
@@ -0,0 +1,39 @@
+import json
+import os
+
+try:
+    from py_notepad.storage.json_stream import JsonNotebookReader
+    from py_notepad.storage.compressed_store import is_compressed_notebook, read_compressed_notebook
+except ImportError:
+    from storage.json_stream import JsonNotebookReader
+    from storage.compressed_store import is_compressed_notebook, read_compressed_notebook
+
+
+class JsonTabStore:
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def content_files(self):
+        return [self.path]
+
+    def save(self, data):
+        with open(self.path, "w", encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=4)
+
+    def load_stream(self, header):
+        if is_compressed_notebook(self.path):
+            return read_compressed_notebook(self.path, header)
+        return JsonNotebookReader(self.path).read(header)
+
+    def load(self):
+        if is_compressed_notebook(self.path):
+            data = {}
+            data["tabs"] = list(read_compressed_notebook(self.path, data))
+            return data
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding='utf-8') as file:
+                return json.load(file)
+        return None
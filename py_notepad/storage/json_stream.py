@@ -0,0 +1,93 @@
+import json
+
+WHITESPACE = " \t\n\r"
+
+
+class JsonNotebookReader:
+    # tabs_data.json을 한 번에 json.load 하지 않고 조금씩 읽으면서 탭을 하나씩 돌려준다.
+    # 버퍼에는 아직 처리하지 않은 부분만 남기므로 메모리는 가장 큰 탭 하나 정도로 유지된다.
+    def __init__(self, path, chunk_size=1024 * 1024):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.file = None
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def read(self, header):
+        # header에는 최상위의 다른 키가 읽히는 대로 채워진다. tabs 뒤에 오는 키(version 등)는
+        # 탭을 모두 읽은 뒤에야 채워진다.
+        with open(self.path, "r", encoding='utf-8') as self.file:
+            self.expect("{")
+            if self.peek() == "}":
+                return
+            while True:
+                key = self.decode()
+                self.expect(":")
+                if key == "tabs":
+                    yield from self.read_array()
+                else:
+                    header[key] = self.decode()
+                if self.next_char() == "}":
+                    return
+
+    def read_array(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.decode()
+            if self.next_char() == "]":
+                return
+
+    def fill(self, size=None):
+        if self.eof:
+            return False
+        chunk = self.file.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # 이미 처리한 앞부분은 버린다
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def skip_whitespace(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer) or not self.fill():
+                return
+
+    def peek(self):
+        self.skip_whitespace()
+        if self.position >= len(self.buffer):
+            raise ValueError(f"Unexpected end of file in {self.path}")
+        return self.buffer[self.position]
+
+    def next_char(self):
+        char = self.peek()
+        self.position += 1
+        return char
+
+    def expect(self, char):
+        found = self.next_char()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found}' in {self.path}")
+
+    def decode(self):
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # 숫자처럼 버퍼 끝에서 끝난 값은 뒤에 이어지는 내용이 있을 수 있다
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # 값이 버퍼보다 크면 지금 버퍼만큼 더 읽어서 다시 시도 횟수를 줄인다
+            self.fill(max(self.chunk_size, len(self.buffer) - self.position))
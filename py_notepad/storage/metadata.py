@@ -0,0 +1,48 @@
+import json
+import os
+
+METADATA_KEYS = ("serial", "version", "active_tab_index")
+
+
+def build_metadata(data):
+    metadata = {key: data.get(key) for key in METADATA_KEYS}
+    metadata["tabs"] = [
+        {"id": tab.get("id"), "title": tab.get("title", "New Tab"), "size": len(tab.get("content", ""))}
+        for tab in data.get("tabs", [])
+    ]
+    return metadata
+
+
+def file_signature(paths):
+    # 저장 파일의 크기와 수정 시각. 사이드카가 가리키는 내용과 실제 파일이 같은지 확인하는 데 쓴다.
+    signature = []
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+class MetadataSidecar:
+    # 버전, serial, 활성 탭, 탭 제목과 크기만 담은 작은 파일. 본문을 파싱하지 않고 읽을 수 있다.
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, data, signature):
+        metadata = build_metadata(data)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding='utf-8') as file:
+            json.dump(dict(metadata, signature=signature), file, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        return metadata
+
+    def read(self, signature):
+        try:
+            with open(self.path, "r", encoding='utf-8') as file:
+                metadata = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if metadata.pop("signature", None) != signature:
+            # 다른 곳에서 저장 파일을 바꿨으면 사이드카를 믿지 않는다
+            return None
+        return metadata
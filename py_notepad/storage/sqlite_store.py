@@ -0,0 +1,189 @@
+import hashlib
+import mimetypes
+import sqlite3
+import threading
+import time
+
+try:
+    from py_notepad.storage.blob_store import BlobStore, BLOB_REF_PATTERN
+    from py_notepad.storage.tab_directory_store import new_tab_id, content_hash
+except ImportError:
+    from storage.blob_store import BlobStore, BLOB_REF_PATTERN
+    from storage.tab_directory_store import new_tab_id, content_hash
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notebooks (
+    serial TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    active_tab_index INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS tabs (
+    serial TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (serial, id)
+);
+CREATE INDEX IF NOT EXISTS tabs_by_position ON tabs (serial, position);
+CREATE TABLE IF NOT EXISTS images (
+    name TEXT PRIMARY KEY,
+    mime_type TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS image_refs (
+    serial TEXT NOT NULL,
+    tab_id TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS image_refs_by_tab ON image_refs (serial, tab_id);
+CREATE INDEX IF NOT EXISTS image_refs_by_name ON image_refs (name);
+CREATE TABLE IF NOT EXISTS versions (
+    serial TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    saved_at REAL NOT NULL,
+    tab_count INTEGER NOT NULL,
+    PRIMARY KEY (serial, version)
+);
+"""
+
+
+class SqliteTabStore:
+    def __init__(self, path, serial):
+        self.path = path
+        self.serial = serial
+        self.lock = threading.Lock()
+        # 저장은 백그라운드 스레드에서도 할 수 있으므로 연결을 공유하고 lock으로 보호한다
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.blob_store = SqliteBlobStore(self)
+        self.last_written = 0
+
+    def exists(self):
+        with self.lock:
+            row = self.connection.execute("SELECT 1 FROM notebooks WHERE serial = ?", (self.serial,)).fetchone()
+        return row is not None
+
+    def save(self, data):
+        tabs = data.get("tabs", [])
+        self.last_written = 0
+        with self.lock, self.connection:
+            # 저장 한 번이 하나의 트랜잭션이다. 내용 해시가 같은 탭은 위치와 제목만 갱신한다.
+            stored = dict(self.connection.execute("SELECT id, hash FROM tabs WHERE serial = ?", (self.serial,)))
+            tab_ids = []
+            for position, tab in enumerate(tabs):
+                tab_id = tab.get("id") or new_tab_id()
+                tab_ids.append(tab_id)
+                content = tab.get("content", "")
+                tab_hash = content_hash(content)
+                if stored.get(tab_id) == tab_hash:
+                    self.connection.execute(
+                        "UPDATE tabs SET position = ?, title = ? WHERE serial = ? AND id = ?",
+                        (position, tab.get("title", "New Tab"), self.serial, tab_id))
+                else:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO tabs (serial, id, position, title, content, hash, size) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (self.serial, tab_id, position, tab.get("title", "New Tab"), content, tab_hash, len(content)))
+                    self.connection.execute("DELETE FROM image_refs WHERE serial = ? AND tab_id = ?",
+                                            (self.serial, tab_id))
+                    self.connection.executemany(
+                        "INSERT INTO image_refs (serial, tab_id, name) VALUES (?, ?, ?)",
+                        [(self.serial, tab_id, name) for name in BLOB_REF_PATTERN.findall(content)])
+                    self.last_written += 1
+
+            removed = [(self.serial, tab_id) for tab_id in set(stored) - set(tab_ids)]
+            self.connection.executemany("DELETE FROM tabs WHERE serial = ? AND id = ?", removed)
+            self.connection.executemany("DELETE FROM image_refs WHERE serial = ? AND tab_id = ?", removed)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO notebooks (serial, version, active_tab_index) VALUES (?, ?, ?)",
+                (self.serial, data.get("version", 0), data.get("active_tab_index", 0)))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO versions (serial, version, saved_at, tab_count) VALUES (?, ?, ?, ?)",
+                (self.serial, data.get("version", 0), time.time(), len(tabs)))
+        print(f"Wrote {self.last_written} of {len(tabs)} tabs to {self.path}.")
+
+    def load(self):
+        with self.lock:
+            notebook = self.connection.execute(
+                "SELECT version, active_tab_index FROM notebooks WHERE serial = ?", (self.serial,)).fetchone()
+            if notebook is None:
+                return None
+            rows = self.connection.execute(
+                "SELECT id, title, content FROM tabs WHERE serial = ? ORDER BY position", (self.serial,)).fetchall()
+        return {
+            "serial": self.serial,
+            "active_tab_index": notebook[1],
+            "tabs": [{"id": tab_id, "title": title, "content": content} for tab_id, title, content in rows],
+            "version": notebook[0],
+        }
+
+    def load_version(self):
+        with self.lock:
+            row = self.connection.execute("SELECT version FROM notebooks WHERE serial = ?", (self.serial,)).fetchone()
+        return row[0] if row is not None else None
+
+    def load_metadata(self):
+        # 본문을 읽지 않고 인덱스만으로 버전, 활성 탭, 탭 제목과 크기를 가져온다
+        with self.lock:
+            notebook = self.connection.execute(
+                "SELECT version, active_tab_index FROM notebooks WHERE serial = ?", (self.serial,)).fetchone()
+            if notebook is None:
+                return None
+            rows = self.connection.execute(
+                "SELECT id, title, size FROM tabs WHERE serial = ? ORDER BY position", (self.serial,)).fetchall()
+        return {
+            "serial": self.serial,
+            "version": notebook[0],
+            "active_tab_index": notebook[1],
+            "tabs": [{"id": tab_id, "title": title, "size": size} for tab_id, title, size in rows],
+        }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class SqliteBlobStore(BlobStore):
+    # 이미지 blob을 파일 대신 images 테이블에 보관한다
+    def __init__(self, store):
+        self.directory = None
+        self.store = store
+
+    def put(self, data, mime_type):
+        extension = (mimetypes.guess_extension(mime_type) or ".bin").lstrip(".")
+        blob_name = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        with self.store.lock, self.store.connection:
+            self.store.connection.execute(
+                "INSERT OR IGNORE INTO images (name, mime_type, data) VALUES (?, ?, ?)",
+                (blob_name, mime_type, sqlite3.Binary(data)))
+        return blob_name
+
+    def exists(self, blob_name):
+        with self.store.lock:
+            return self.store.connection.execute(
+                "SELECT 1 FROM images WHERE name = ?", (blob_name,)).fetchone() is not None
+
+    def get(self, blob_name):
+        with self.store.lock:
+            row = self.store.connection.execute(
+                "SELECT data, mime_type FROM images WHERE name = ?", (blob_name,)).fetchone()
+        if row is None:
+            return None
+        return bytes(row[0]), row[1]
+
+    def update_references(self, html_list):
+        # 참조는 탭을 쓸 때 image_refs 테이블에 기록되므로 여기서는 정리만 한다
+        return self.collect_garbage()
+
+    def collect_garbage(self, references=None):
+        with self.store.lock, self.store.connection:
+            removed = self.store.connection.execute(
+                "DELETE FROM images WHERE name NOT IN (SELECT name FROM image_refs)").rowcount
+        if removed:
+            print(f"Removed {removed} unreferenced image blobs.")
+        return removed
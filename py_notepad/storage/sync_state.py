@@ -0,0 +1,26 @@
+import json
+import os
+
+
+class TabSyncState:
+    # 마지막으로 서버와 맞춘 시점의 탭별 상태를 기록한다.
+    # local_hash는 로컬에 저장된 본문(blob 참조 형태)의 해시, server_hash와 version은 서버가 알려준 값이다.
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, serial):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding='utf-8') as file:
+                    state = json.load(file)
+                if state.get("serial") == serial:
+                    return state
+            except (OSError, ValueError) as e:
+                print(f"Failed to read sync state: {e}")
+        return {"serial": serial, "version": 0, "tabs": {}}
+
+    def save(self, state):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding='utf-8') as file:
+            json.dump(state, file, ensure_ascii=False)
+        os.replace(temp_path, self.path)
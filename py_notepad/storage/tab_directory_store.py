@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import uuid
+
+
+def new_tab_id():
+    return uuid.uuid4().hex
+
+
+def content_hash(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class TabDirectoryStore:
+    # manifest.json 하나와 탭마다 하나씩의 레코드 파일로 저장한다.
+    # 레코드 파일 이름에 내용 해시가 들어가므로 바뀐 탭만 새로 쓰고,
+    # manifest를 원자적으로 교체한 뒤에 더 이상 쓰지 않는 레코드를 지운다.
+    def __init__(self, directory):
+        self.directory = directory
+        self.tabs_directory = os.path.join(directory, "tabs")
+        self.manifest_file = os.path.join(directory, "manifest.json")
+        self.last_written = 0
+
+    def exists(self):
+        return os.path.exists(self.manifest_file)
+
+    def content_files(self):
+        return [self.manifest_file]
+
+    def record_file(self, tab_id, tab_hash):
+        return os.path.join(self.tabs_directory, f"{tab_id}-{tab_hash}.html")
+
+    def load_manifest(self):
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, "r", encoding='utf-8') as file:
+                return json.load(file)
+        return None
+
+    def save(self, data):
+        os.makedirs(self.tabs_directory, exist_ok=True)
+        manifest = {key: value for key, value in data.items() if key != "tabs"}
+        manifest["tabs"] = []
+        self.last_written = 0
+
+        for tab in data.get("tabs", []):
+            tab_id = tab.get("id") or new_tab_id()
+            content = tab.get("content", "")
+            tab_hash = content_hash(content)
+            path = self.record_file(tab_id, tab_hash)
+            if not os.path.exists(path):
+                self._write_atomic(path, content)
+                self.last_written += 1
+            entry = {key: value for key, value in tab.items() if key != "content"}
+            entry.update({"id": tab_id, "hash": tab_hash, "size": len(content)})
+            manifest["tabs"].append(entry)
+
+        self._write_atomic(self.manifest_file, json.dumps(manifest, ensure_ascii=False, indent=4))
+        self._remove_unused_records(manifest)
+        print(f"Wrote {self.last_written} of {len(manifest['tabs'])} tab records.")
+
+    def load(self):
+        manifest = self.load_manifest()
+        if manifest is None:
+            return None
+        data = {key: value for key, value in manifest.items() if key != "tabs"}
+        data["tabs"] = [self.load_tab(entry) for entry in manifest.get("tabs", [])]
+        return data
+
+    def load_tab(self, entry):
+        with open(self.record_file(entry["id"], entry["hash"]), "r", encoding='utf-8') as file:
+            content = file.read()
+        tab = {key: value for key, value in entry.items() if key not in ("hash", "size")}
+        tab["content"] = content
+        return tab
+
+    def _remove_unused_records(self, manifest):
+        used = {os.path.basename(self.record_file(entry["id"], entry["hash"])) for entry in manifest["tabs"]}
+        for file_name in os.listdir(self.tabs_directory):
+            if file_name not in used:
+                os.remove(os.path.join(self.tabs_directory, file_name))
+
+    def _write_atomic(self, path, text):
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding='utf-8') as file:
+            file.write(text)
+        os.replace(temp_path, path)
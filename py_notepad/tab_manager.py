@@ -1,6 +1,11 @@
 from PyQt5.QtWidgets import QTextEdit, QMenu, QAction, QMessageBox
 from datetime import datetime
 
+try:
+    from py_notepad.storage.tab_directory_store import new_tab_id
+except ImportError:
+    from storage.tab_directory_store import new_tab_id
+
 class TabManager:
     def __init__(self, parent):
         self.parent = parent
@@ -49,8 +54,9 @@ class TabManager:
 
             menu.exec_(self.parent.tabs.tabBar().mapToGlobal(position))
 
-    def new_tab(self, content="", title="New Tab"):
+    def new_tab(self, content="", title="New Tab", tab_id=None):
         editor = QTextEdit()
+        editor.tab_id = tab_id or new_tab_id()
 
         if content == "":
             now = datetime.now()
@@ -169,7 +175,7 @@ class TabManager:
         self.parent.tabs.clear()
         tabs_data = data.get("tabs", [])
         for tab in tabs_data:
-            self.new_tab(tab.get("content", ""), tab.get("title", "New Tab"))
+            self.new_tab(tab.get("content", ""), tab.get("title", "New Tab"), tab.get("id"))
 
         # Restore the active tab index
         active_tab_index = data.get("active_tab_index", 0)
@@ -0,0 +1,103 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 엔드포인트별 응답(read) 대기 시간(초). 연결(connect) 대기 시간은 호출하는 쪽의 timeout을 쓴다.
+# 작업 스레드의 요청에만 쓰고, GUI 스레드의 요청은 호출하는 쪽의 timeout을 넘기지 않는다.
+ENDPOINT_TIMEOUTS = {
+    "health": 1,
+    "list_serials": 2,
+    "tabs_manifest": 5,
+    "load_tabs": 30,
+    "save_tabs": 30,
+    "fetch_tabs": 30,
+    "save_tab_changes": 30,
+}
+
+
+class ServerTransport:
+    # 모든 서버 요청이 같은 requests.Session을 쓰게 해서 keep-alive 연결을 재사용한다.
+    # 작업 스레드의 요청은 연결 실패와 일시적인 5xx 응답을 Retry 정책에 따라 다시 시도한다.
+    # GUI 스레드의 요청은 화면이 멈추지 않도록 다시 시도하지 않는 별도 세션을 쓴다.
+    def __init__(self, pool_size=4, retries=2, backoff_factor=0.2, timeouts=None):
+        self.timeouts = dict(ENDPOINT_TIMEOUTS, **(timeouts or {}))
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.failure_count = 0
+        self.session = None
+        self.gui_session = None
+        self.configure(pool_size, retries, backoff_factor)
+
+    def configure(self, pool_size=4, retries=2, backoff_factor=0.2):
+        # 읽기 중에 끊긴 요청은 서버가 이미 처리했을 수 있으므로 다시 보내지 않는다. POST도
+        # 상태 코드로는 다시 시도하지 않는다(Retry 기본값은 멱등 메서드만 허용).
+        retry = Retry(total=retries, connect=retries, read=0, status=retries, backoff_factor=backoff_factor,
+                      status_forcelist=(502, 503, 504), raise_on_status=False)
+        session = self.new_session(pool_size, retry)
+        gui_session = self.new_session(1, Retry(total=0, read=0, raise_on_status=False))
+        with self.lock:
+            old_sessions = (self.session, self.gui_session)
+            self.session, self.gui_session = session, gui_session
+            self.pool_size = pool_size
+            self.retries = retries
+        for old_session in old_sessions:
+            if old_session is not None:
+                old_session.close()
+
+    def new_session(self, pool_size, retry):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def timeout_for(self, endpoint, connect_timeout, gui_thread=False):
+        read_timeout = self.timeouts.get(endpoint)
+        if read_timeout is None or gui_thread:
+            return connect_timeout
+        return connect_timeout, max(read_timeout, connect_timeout)
+
+    def request(self, method, url, endpoint=None, timeout=5, **kwargs):
+        gui_thread = threading.current_thread() is threading.main_thread()
+        with self.lock:
+            session = self.gui_session if gui_thread else self.session
+            self.request_count += 1
+        try:
+            return session.request(method, url, timeout=self.timeout_for(endpoint, timeout, gui_thread), **kwargs)
+        except requests.exceptions.RequestException:
+            with self.lock:
+                self.failure_count += 1
+            raise
+
+    def get(self, url, endpoint=None, timeout=5, **kwargs):
+        return self.request("GET", url, endpoint, timeout, **kwargs)
+
+    def post(self, url, endpoint=None, timeout=5, **kwargs):
+        return self.request("POST", url, endpoint, timeout, **kwargs)
+
+    def stats(self):
+        # urllib3 연결 풀이 센 값. 새로 연 연결보다 요청이 많으면 그만큼 연결을 재사용한 것이다.
+        # 풀 설정을 바꾸면 이전 풀의 값은 사라진다.
+        connections = 0
+        pooled_requests = 0
+        with self.lock:
+            for session in (self.session, self.gui_session):
+                pool_manager = session.get_adapter("http://").poolmanager
+                for key in list(pool_manager.pools.keys()):
+                    pool = pool_manager.pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+                        pooled_requests += pool.num_requests
+            return {
+                "requests": self.request_count,
+                "failures": self.failure_count,
+                "connections": connections,
+                "reused": max(pooled_requests - connections, 0),
+                "pool_size": self.pool_size,
+                "retries": self.retries,
+            }
+
+
+server_transport = ServerTransport()